@@ -54,6 +54,26 @@ SIMPLE_JWT = {
    "ROTATE_REFRESH_TOKENS": True
 }
 
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+SEAT_HOLD_MAX_PER_REQUEST = 10
+
+SEAT_HOLD_MAX_PER_USER = 20
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+MIN_TRANSFER_TIME = timedelta(minutes=15)
+
+ROUTE_NETWORK_DIR = BASE_DIR / "var" / "route_network"
+
+JOB_VISIBILITY_TIMEOUT = timedelta(minutes=5)
+
+JOB_MAX_ATTEMPTS = 5
+
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+
+DEFAULT_FROM_EMAIL = "tickets@railroad.local"
+
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -68,7 +88,18 @@ REST_FRAMEWORK = {
         "anon": "10/min",
         "user": "40/min"
     },
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination"
+    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "railroad.renderers.MessagePackRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+        "railroad.parsers.MessagePackParser",
+    ),
 }
 
 MIDDLEWARE = [
@@ -111,6 +142,33 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "var" / "cache",
+        "OPTIONS": {
+            "MAX_ENTRIES": 10000,
+            "CULL_FREQUENCY": 4,
+        },
+    },
+    # Data versions must never be culled, or cached responses and
+    # indexes would be served under a version that moved on. There
+    # is one key per model and per station board.
+    "versions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "var" / "versions",
+        "TIMEOUT": None,
+        "OPTIONS": {
+            "MAX_ENTRIES": 1000000,
+        },
+    },
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
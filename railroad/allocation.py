@@ -0,0 +1,133 @@
+from rest_framework.exceptions import ValidationError
+
+from railroad import holds
+from railroad.models import Ticket
+from railroad.seat_map import seat_maps
+
+
+def free_runs(seat_map, excluded):
+    """Yield (cargo, seats) for every run of adjacent free seats."""
+    for cargo in range(1, seat_map.cargo_num + 1):
+        run = []
+        for seat in range(1, seat_map.places_in_cargo + 1):
+            if seat_map.is_taken(cargo, seat) or (
+                (cargo, seat) in excluded
+            ):
+                if run:
+                    yield cargo, run
+                run = []
+                continue
+            run.append(seat)
+        if run:
+            yield cargo, run
+
+
+def pick_seats(seat_map, count, together=True, excluded=()):
+    excluded = set(excluded)
+    runs = list(free_runs(seat_map, excluded))
+    if sum(len(seats) for _, seats in runs) < count:
+        raise ValidationError(
+            f"Journey has less than {count} free seats"
+        )
+
+    if together:
+        fitting = [
+            (cargo, seats)
+            for cargo, seats in runs
+            if len(seats) >= count
+        ]
+        if fitting:
+            cargo, seats = min(
+                fitting, key=lambda run: len(run[1])
+            )
+            return [(cargo, seat) for seat in seats[:count]]
+        runs.sort(key=lambda run: len(run[1]), reverse=True)
+
+    picked = []
+    for cargo, seats in runs:
+        for seat in seats[: count - len(picked)]:
+            picked.append((cargo, seat))
+        if len(picked) == count:
+            break
+    return picked
+
+
+def allocate_seats(
+    journey, count, together, buyer, reserved
+):
+    excluded = {
+        (cargo, seat)
+        for journey_id, cargo, seat in reserved
+        if journey_id == journey.id
+    }
+    excluded.update(
+        holds.active_holds()
+        .filter(journey=journey)
+        .exclude(user=buyer)
+        .values_list("cargo", "seat")
+    )
+
+    for _ in range(2):
+        picked = pick_seats(
+            seat_maps.get(journey),
+            count,
+            together,
+            excluded,
+        )
+        sold = holds.seats_filter(
+            {
+                "journey": journey,
+                "cargo": cargo,
+                "seat": seat,
+            }
+            for cargo, seat in picked
+        )
+        if not Ticket.objects.filter(sold).exists():
+            return picked
+        seat_maps.invalidate(journey.id)
+    raise ValidationError(
+        "Seats could not be allocated, please try again"
+    )
+
+
+def allocate_tickets(
+    seat_requests, tickets, buyer, claimed=()
+):
+    """Pick seats for ``seat_requests``.
+
+    Seats in ``tickets`` and ``(journey_id, cargo, seat)`` triples in
+    ``claimed``, e.g. taken by earlier orders of the same batch, are
+    never picked.
+    """
+    reserved = {
+        (
+            ticket["journey"].id,
+            ticket["cargo"],
+            ticket["seat"],
+        )
+        for ticket in tickets
+    }
+    reserved.update(claimed)
+    allocated = []
+    for seat_request in seat_requests:
+        journey = seat_request["journey"]
+        if journey.train is None:
+            raise ValidationError(
+                "Journey has no train assigned"
+            )
+        for cargo, seat in allocate_seats(
+            journey,
+            seat_request["seats"],
+            seat_request["together"],
+            buyer,
+            reserved,
+        ):
+            reserved.add((journey.id, cargo, seat))
+            allocated.append(
+                {
+                    "cargo": cargo,
+                    "seat": seat,
+                    "journey": journey,
+                }
+            )
+    return allocated
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "railroad"
+
+    def ready(self):
+        from railroad import signals, tasks  # noqa: F401
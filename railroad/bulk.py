@@ -0,0 +1,184 @@
+import json
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from railroad import inventory
+from railroad.models import Journey
+from railroad.serializers import OrderSerializer
+
+CHUNK_SIZE = 500
+
+
+def read_ndjson(stream):
+    """Yield (line number, payload or None, error or None)."""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except ValueError as error:
+            yield line_no, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(payload, dict):
+            yield line_no, None, "Order must be a JSON object"
+            continue
+        yield line_no, payload, None
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def referenced_journeys(payloads):
+    journey_ids = {
+        item.get("journey")
+        for payload in payloads
+        for key in ("tickets", "seat_requests")
+        for item in payload.get(key) or []
+        if isinstance(item, dict)
+    }
+    journey_ids = {
+        journey_id
+        for journey_id in journey_ids
+        if isinstance(journey_id, int)
+    }
+    return Journey.objects.select_related("train").in_bulk(
+        journey_ids
+    )
+
+
+def seats_of(validated_data):
+    return {
+        (
+            ticket["journey"].id,
+            ticket["cargo"],
+            ticket["seat"],
+        )
+        for ticket in validated_data["tickets"]
+    }
+
+
+def conflict_result(line_no, conflicts):
+    return {
+        "line": line_no,
+        "conflicts": [
+            {
+                "journey": journey_id,
+                "cargo": cargo,
+                "seat": seat,
+            }
+            for journey_id, cargo, seat in sorted(conflicts)
+        ],
+    }
+
+
+def create_one_by_one(accepted, user):
+    for line_no, validated_data in accepted:
+        try:
+            with transaction.atomic():
+                (order,) = OrderSerializer.bulk_create(
+                    [{**validated_data, "user": user}]
+                )
+        except inventory.SeatConflict as conflict:
+            yield conflict_result(
+                line_no, conflict.conflicts
+            )
+            continue
+        except IntegrityError:
+            yield conflict_result(
+                line_no,
+                inventory.sold_seats(
+                    seats_of(validated_data)
+                ),
+            )
+            continue
+        yield {"line": line_no, "id": order.id}
+
+
+def ingest_chunk(lines, user, context):
+    results = {}
+    context = {
+        **context,
+        "journeys": referenced_journeys(
+            payload for _, payload, _ in lines if payload
+        ),
+        # Seats of earlier lines, kept out of later seat_requests.
+        "reserved": set(),
+    }
+
+    validated = []
+    for line_no, payload, error in lines:
+        if error is not None:
+            results[line_no] = {
+                "line": line_no,
+                "errors": error,
+            }
+            continue
+        serializer = OrderSerializer(
+            data=payload, context=context
+        )
+        if not serializer.is_valid():
+            results[line_no] = {
+                "line": line_no,
+                "errors": serializer.errors,
+            }
+            continue
+        validated.append(
+            (line_no, serializer.validated_data)
+        )
+        context["reserved"] |= seats_of(
+            serializer.validated_data
+        )
+
+    taken = inventory.sold_seats(
+        set().union(
+            *(seats_of(data) for _, data in validated)
+        )
+    )
+    accepted = []
+    for line_no, validated_data in validated:
+        seats = seats_of(validated_data)
+        if conflicts := seats & taken:
+            results[line_no] = conflict_result(
+                line_no, conflicts
+            )
+            continue
+        taken |= seats
+        accepted.append((line_no, validated_data))
+
+    try:
+        with transaction.atomic():
+            orders = OrderSerializer.bulk_create(
+                [
+                    {**validated_data, "user": user}
+                    for _, validated_data in accepted
+                ]
+            )
+    except (inventory.SeatConflict, IntegrityError):
+        for result in create_one_by_one(accepted, user):
+            results[result["line"]] = result
+    else:
+        for (line_no, _), order in zip(accepted, orders):
+            results[line_no] = {
+                "line": line_no,
+                "id": order.id,
+            }
+
+    return [results[line_no] for line_no, _, _ in lines]
+
+
+def ingest_orders(
+    stream, user, context, chunk_size=CHUNK_SIZE
+):
+    """Create orders from an NDJSON stream, yielding one result per line.
+
+    Every chunk is validated against a shared journey lookup, checked
+    for seats sold already or claimed by an earlier line, and written
+    with a single bulk_create of orders and tickets.
+    """
+    for lines in chunked(read_ndjson(stream), chunk_size):
+        yield from ingest_chunk(lines, user, context)
@@ -0,0 +1,90 @@
+import csv
+import json
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+
+from railroad.projections import DATETIME
+
+CHUNK_SIZE = 2000
+
+TICKET_COLUMNS = {
+    "id": "id",
+    "order": "order_id",
+    "ordered_at": "order__created_at",
+    "user": "order__user__email",
+    "journey": "journey_id",
+    "source": "journey__route__source__name",
+    "destination": "journey__route__destination__name",
+    "departure_time": "journey__departure_time",
+    "arrival_time": "journey__arrival_time",
+    "cargo": "cargo",
+    "seat": "seat",
+}
+
+ORDER_COLUMNS = {
+    "id": "id",
+    "created_at": "created_at",
+    "user": "user__email",
+    "tickets": "tickets_count",
+}
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class Echo:
+    """File-like object handing written lines back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, columns):
+    """Stream rows through a server-side cursor in fixed-size chunks."""
+    rows = queryset.values_list(*columns.values()).iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    for row in rows:
+        yield [
+            (
+                DATETIME.to_representation(value)
+                if isinstance(value, datetime)
+                else value
+            )
+            for value in row
+        ]
+
+
+def csv_lines(rows, header):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows, header):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row))) + "\n"
+
+
+def streaming_export(
+    queryset, columns, export_format, name
+):
+    header = list(columns)
+    rows = export_rows(queryset.order_by("id"), columns)
+    if export_format == "csv":
+        lines = csv_lines(rows, header)
+    else:
+        lines = ndjson_lines(rows, header)
+    return StreamingHttpResponse(
+        lines,
+        content_type=CONTENT_TYPES[export_format],
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{name}.{export_format}"'
+            )
+        },
+    )
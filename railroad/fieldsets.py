@@ -0,0 +1,181 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import (
+    BaseSerializer,
+    ListSerializer,
+)
+
+
+def parse_paths(value):
+    """Turn ``"id,journey.route.source"`` into a nested dict.
+
+    An empty dict means the field is taken whole.
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def unwrap(field):
+    if isinstance(field, ListSerializer):
+        return field.child
+    return field
+
+
+def collapse(field):
+    kwargs = {}
+    if field.source != field.field_name:
+        kwargs["source"] = field.source
+    return PrimaryKeyRelatedField(
+        read_only=True,
+        many=isinstance(field, ListSerializer),
+        **kwargs,
+    )
+
+
+def reshape(serializer, fields, expand):
+    """Drop fields missing from ``fields`` and collapse nested objects
+    missing from ``expand`` to their primary keys, in place.
+
+    ``None`` for either tree leaves that level of the shape untouched.
+    """
+    serializer = unwrap(serializer)
+    for name in list(serializer.fields):
+        field = serializer.fields[name]
+        if fields and name not in fields:
+            del serializer.fields[name]
+            continue
+        nested = unwrap(field)
+        if not isinstance(nested, BaseSerializer):
+            continue
+        if expand is not None and name not in expand:
+            if field.source != "*" and not field.write_only:
+                serializer.fields[name] = collapse(field)
+            continue
+        reshape(
+            nested,
+            fields.get(name) if fields else None,
+            (
+                expand.get(name)
+                if expand is not None
+                else None
+            ),
+        )
+
+
+def reads_relation(serializer, name):
+    """Whether a field left in the shape reads the relation ``name``.
+
+    Serializers list the relations their plain fields read through
+    model properties in ``field_relations``, e.g.
+    ``{"free_seats": ("train",)}``.
+    """
+    relations = getattr(serializer, "field_relations", {})
+    return any(
+        name in relations.get(field.source, ())
+        for field in serializer.fields.values()
+    )
+
+
+def needed_path(serializer, path):
+    """Trim a ``select_related`` path to the joins the shape reads."""
+    needed = []
+    for name in path.split("__"):
+        serializer = unwrap(serializer)
+        field = next(
+            (
+                field
+                for field in serializer.fields.values()
+                if field.source.split(".")[0] == name
+            ),
+            None,
+        )
+        if field is None or isinstance(
+            field, PrimaryKeyRelatedField
+        ):
+            if reads_relation(serializer, name):
+                needed.append(name)
+            break
+        needed.append(name)
+        if not isinstance(unwrap(field), BaseSerializer):
+            # A plain field reading the relation, e.g. its __str__,
+            # may use anything below it.
+            return path
+        serializer = field
+    return "__".join(needed)
+
+
+def related_paths(tree, prefix=""):
+    for name, children in tree.items():
+        path = prefix + name
+        if children:
+            yield from related_paths(children, path + "__")
+        else:
+            yield path
+
+
+class SparseFieldsetMixin:
+    """Shape read responses with ``?fields=`` and ``?expand=``.
+
+    ``fields`` lists the fields to keep, with dots selecting inside
+    nested objects. Once ``expand`` is passed, nested objects it
+    doesn't name are rendered as ids. List and detail querysets only
+    join the relations the resulting shape still reads.
+    """
+
+    def get_requested_shape(self):
+        request = self.request
+        if (
+            request is None
+            or request.method not in SAFE_METHODS
+        ):
+            return None
+        params = request.query_params
+        if (
+            "fields" not in params
+            and "expand" not in params
+        ):
+            return None
+        expand = params.get("expand")
+        return (
+            parse_paths(params.get("fields", "")),
+            (
+                parse_paths(expand)
+                if expand is not None
+                else None
+            ),
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        shape = self.get_requested_shape()
+        if shape is not None:
+            reshape(serializer, *shape)
+        return serializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if (
+            self.action not in ("list", "retrieve")
+            or self.get_requested_shape() is None
+        ):
+            return queryset
+
+        related = queryset.query.select_related
+        if not isinstance(related, dict):
+            return queryset
+        serializer = self.get_serializer()
+        paths = {
+            needed_path(serializer, path)
+            for path in related_paths(related)
+        }
+        paths.discard("")
+        queryset = queryset.select_related(None)
+        if paths:
+            # select_related() without arguments follows every
+            # foreign key, so it is only called with paths
+            queryset = queryset.select_related(*paths)
+        return queryset
@@ -1,6 +1,16 @@
 from django_filters import rest_framework as filters
 
-from railroad.models import Journey, Train
+from railroad.models import (
+    Journey,
+    Order,
+    Route,
+    Ticket,
+    Train,
+)
+from railroad.search import (
+    station_lookup,
+    train_type_lookup,
+)
 
 
 class JourneyFilter(filters.FilterSet):
@@ -19,16 +29,13 @@ class JourneyFilter(filters.FilterSet):
         field_name="arrival_time", lookup_expr="lt"
     )
     destination = filters.CharFilter(
-        field_name="route__destination__name",
-        lookup_expr="icontains",
+        method="filter_destination",
     )
     source = filters.CharFilter(
-        field_name="route__source__name",
-        lookup_expr="icontains",
+        method="filter_source",
     )
     train_type = filters.CharFilter(
-        field_name="train__train_type__name",
-        lookup_expr="icontains",
+        method="filter_train_type",
     )
 
     class Meta:
@@ -41,6 +48,29 @@ class JourneyFilter(filters.FilterSet):
             "train__train_type",
         )
 
+    @staticmethod
+    def filter_source(queryset, name, value):
+        routes = Route.objects.filter(
+            source_id__in=station_lookup.ids_containing(value)
+        )
+        return queryset.filter(route__in=routes)
+
+    @staticmethod
+    def filter_destination(queryset, name, value):
+        routes = Route.objects.filter(
+            destination_id__in=station_lookup.ids_containing(value)
+        )
+        return queryset.filter(route__in=routes)
+
+    @staticmethod
+    def filter_train_type(queryset, name, value):
+        trains = Train.objects.filter(
+            train_type_id__in=train_type_lookup.ids_containing(
+                value
+            )
+        )
+        return queryset.filter(train__in=trains)
+
 
 class TrainFilter(filters.FilterSet):
     types = filters.CharFilter(
@@ -51,3 +81,38 @@ class TrainFilter(filters.FilterSet):
     class Meta:
         model = Train
         fields = ("train_type",)
+
+
+class TicketFilter(filters.FilterSet):
+    departure_after = filters.DateFilter(
+        field_name="journey__departure_time",
+        lookup_expr="gt",
+    )
+    departure_before = filters.DateFilter(
+        field_name="journey__departure_time", lookup_expr="lt"
+    )
+    ordered_after = filters.DateFilter(
+        field_name="order__created_at",
+        lookup_expr="gt",
+    )
+    ordered_before = filters.DateFilter(
+        field_name="order__created_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = Ticket
+        fields = ("journey", "order")
+
+
+class OrderFilter(filters.FilterSet):
+    created_after = filters.DateFilter(
+        field_name="created_at",
+        lookup_expr="gt",
+    )
+    created_before = filters.DateFilter(
+        field_name="created_at", lookup_expr="lt"
+    )
+
+    class Meta:
+        model = Order
+        fields = ("user",)
@@ -0,0 +1,179 @@
+import heapq
+import math
+
+import numpy as np
+
+from railroad.indexes import LazyIndex
+from railroad.models import Station
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(
+    latitude1, longitude1, latitude2, longitude2
+):
+    """Great-circle distance; takes scalars or broadcastable arrays."""
+    latitude1, longitude1, latitude2, longitude2 = map(
+        np.radians,
+        (latitude1, longitude1, latitude2, longitude2),
+    )
+    a = (
+        np.sin((latitude2 - latitude1) / 2) ** 2
+        + np.cos(latitude1)
+        * np.cos(latitude2)
+        * np.sin((longitude2 - longitude1) / 2) ** 2
+    )
+    return (
+        2
+        * EARTH_RADIUS_KM
+        * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    )
+
+
+def distance_matrix(latitudes, longitudes):
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    return haversine_km(
+        latitudes[:, None],
+        longitudes[:, None],
+        latitudes[None, :],
+        longitudes[None, :],
+    )
+
+
+def route_distance(source, destination) -> int:
+    return int(
+        round(
+            float(
+                haversine_km(
+                    source.latitude,
+                    source.longitude,
+                    destination.latitude,
+                    destination.longitude,
+                )
+            )
+        )
+    )
+
+
+def unit_vector(latitude, longitude):
+    latitude = math.radians(latitude)
+    longitude = math.radians(longitude)
+    return (
+        math.cos(latitude) * math.cos(longitude),
+        math.cos(latitude) * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+def chord_to_km(chord):
+    return (
+        2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+    )
+
+
+def km_to_chord(km):
+    angle = min(km / EARTH_RADIUS_KM, math.pi)
+    return 2 * math.sin(angle / 2)
+
+
+class KDTree:
+    """k-d tree over points on the unit sphere.
+
+    Straight-line (chord) distance between unit vectors grows
+    monotonically with great-circle distance, so nearest neighbours in
+    3D are nearest on the globe, with no special case for the poles or
+    the antimeridian.
+    """
+
+    def __init__(self, points):
+        self.root = self._build(list(points), depth=0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda point: point[0][axis])
+        median = len(points) // 2
+        vector, item = points[median]
+        return (
+            vector,
+            item,
+            axis,
+            self._build(points[:median], depth + 1),
+            self._build(points[median + 1 :], depth + 1),
+        )
+
+    def nearest(self, vector, k, max_distance):
+        found = []
+
+        def visit(node):
+            if node is None:
+                return
+            point, item, axis, left, right = node
+            distance = math.dist(vector, point)
+            if distance <= max_distance:
+                entry = (-distance, id(item), item)
+                if len(found) < k:
+                    heapq.heappush(found, entry)
+                elif distance < -found[0][0]:
+                    heapq.heapreplace(found, entry)
+
+            offset = vector[axis] - point[axis]
+            near, far = (
+                (left, right)
+                if offset < 0
+                else (right, left)
+            )
+            visit(near)
+            bound = (
+                -found[0][0]
+                if len(found) == k
+                else max_distance
+            )
+            if abs(offset) <= bound:
+                visit(far)
+
+        visit(self.root)
+        return sorted(
+            (
+                (-distance, item)
+                for distance, _, item in found
+            ),
+            key=lambda entry: entry[0],
+        )
+
+
+class StationLocator(LazyIndex):
+    versions = ("station",)
+
+    def build(self):
+        stations = Station.objects.values(
+            "id", "name", "latitude", "longitude"
+        )
+        return KDTree(
+            (
+                unit_vector(
+                    station["latitude"],
+                    station["longitude"],
+                ),
+                station,
+            )
+            for station in stations
+        )
+
+    def nearby(self, latitude, longitude, radius_km, k):
+        return [
+            {
+                **station,
+                "distance": round(chord_to_km(chord), 3),
+            }
+            for chord, station in self.get().nearest(
+                unit_vector(latitude, longitude),
+                k,
+                km_to_chord(radius_km),
+            )
+        ]
+
+
+station_locator = StationLocator()
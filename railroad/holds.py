@@ -0,0 +1,83 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from app import settings
+from railroad import inventory
+from railroad.models import SeatHold, Ticket
+
+
+def seats_filter(seats) -> Q:
+    return inventory.seats_filter(
+        (seat["journey"].id, seat["cargo"], seat["seat"])
+        for seat in seats
+    )
+
+
+def active_holds():
+    return SeatHold.objects.filter(
+        expires_at__gt=timezone.now()
+    )
+
+
+def release_expired() -> int:
+    deleted, _ = SeatHold.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
+
+
+def hold_seats(user, seats) -> list[SeatHold]:
+    if len(seats) > settings.SEAT_HOLD_MAX_PER_REQUEST:
+        raise ValidationError(
+            "Hold at most "
+            f"{settings.SEAT_HOLD_MAX_PER_REQUEST} seats at once"
+        )
+    now = timezone.now()
+    journey_ids = {seat["journey"].id for seat in seats}
+
+    with transaction.atomic():
+        inventory.lock_journeys(journey_ids)
+        SeatHold.objects.filter(
+            journey_id__in=journey_ids, expires_at__lte=now
+        ).delete()
+        SeatHold.objects.filter(
+            seats_filter(seats), user=user
+        ).delete()
+        held = SeatHold.objects.filter(
+            user=user, expires_at__gt=now
+        ).count()
+        if (
+            held + len(seats)
+            > settings.SEAT_HOLD_MAX_PER_USER
+        ):
+            raise ValidationError(
+                "Hold at most "
+                f"{settings.SEAT_HOLD_MAX_PER_USER} seats at a time"
+            )
+
+        if Ticket.objects.filter(
+            seats_filter(seats)
+        ).exists():
+            raise ValidationError(
+                "Some of these seats are already sold"
+            )
+
+        holds = [
+            SeatHold(
+                user=user,
+                expires_at=now + settings.SEAT_HOLD_TTL,
+                **seat,
+            )
+            for seat in seats
+        ]
+        try:
+            with transaction.atomic():
+                SeatHold.objects.bulk_create(holds)
+        except IntegrityError:
+            raise ValidationError(
+                "Some of these seats are already held"
+            )
+
+    return holds
@@ -0,0 +1,107 @@
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    ValidationError,
+)
+from rest_framework.response import Response
+
+from app import settings
+from railroad.models import IdempotencyKey
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Idempotency-Key was already used with another payload"
+    default_code = "idempotency_key_reused"
+
+
+def request_fingerprint(request):
+    payload = json.dumps(
+        request.data, sort_keys=True, default=str
+    ).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def purge_expired() -> int:
+    deleted, _ = IdempotencyKey.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
+
+
+class IdempotentCreateMixin:
+    """Replay the stored response of a create with a known Idempotency-Key.
+
+    The key is claimed in the same transaction as the create, so a
+    concurrent retry waits for the first request to commit and then
+    replays its response instead of creating a duplicate.
+    """
+
+    idempotency_header = "Idempotency-Key"
+
+    def get_stored_response(self, key):
+        return IdempotencyKey.objects.filter(
+            user=self.request.user,
+            key=key,
+            expires_at__gt=timezone.now(),
+        ).first()
+
+    def replay(self, stored, fingerprint):
+        if stored.request_hash != fingerprint:
+            raise IdempotencyKeyReused()
+        return Response(
+            stored.response,
+            status=stored.status_code,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > 255:
+            raise ValidationError(
+                "Idempotency-Key can't be longer than 255 characters"
+            )
+
+        fingerprint = request_fingerprint(request)
+        stored = self.get_stored_response(key)
+        if stored is not None:
+            return self.replay(stored, fingerprint)
+
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.filter(
+                    user=request.user,
+                    key=key,
+                    expires_at__lte=timezone.now(),
+                ).delete()
+                claim = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    request_hash=fingerprint,
+                    expires_at=timezone.now()
+                    + settings.IDEMPOTENCY_KEY_TTL,
+                )
+                response = super().create(
+                    request, *args, **kwargs
+                )
+                claim.status_code = response.status_code
+                claim.response = response.data
+                claim.save(
+                    update_fields=(
+                        "status_code",
+                        "response",
+                    )
+                )
+        except IntegrityError:
+            stored = self.get_stored_response(key)
+            if stored is None:
+                raise
+            return self.replay(stored, fingerprint)
+        return response
@@ -0,0 +1,63 @@
+import threading
+
+from railroad.response_cache import get_versions
+
+
+class LazyIndex:
+    """Process-local read index built from the database on first use.
+
+    ``versions`` names the shared data versions the index is built
+    from. ``get()`` compares them with the versions of the current
+    data, so a write made through any process is picked up on the
+    next read. ``refresh()`` may bring outdated data up to date in
+    place of a full ``build()``. ``invalidate()`` drops the data of
+    this process only. A build that raced with it is served once but
+    never kept.
+    """
+
+    versions = ()
+
+    def __init__(self):
+        self._data = None
+        self._data_versions = None
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def build(self):
+        raise NotImplementedError
+
+    def refresh(self, data, data_versions, versions):
+        """Return ``data`` brought up to ``versions``, or None."""
+        return None
+
+    def get(self):
+        versions = get_versions(self.versions)
+        with self._lock:
+            data = self._data
+            data_versions = self._data_versions
+            if (
+                data is not None
+                and data_versions == versions
+            ):
+                return data
+            generation = self._generation
+
+        # Versions are read before the build, so a write landing
+        # during it makes the next get() build again.
+        if data is not None:
+            data = self.refresh(
+                data, data_versions, versions
+            )
+        if data is None:
+            data = self.build()
+
+        with self._lock:
+            if self._generation == generation:
+                self._data = data
+                self._data_versions = versions
+        return data
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._data = None
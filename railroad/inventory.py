@@ -0,0 +1,144 @@
+from collections import Counter
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import (
+    Count,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from railroad.models import Journey, Ticket
+from railroad.response_cache import bump_versions
+from railroad.seat_map import seat_maps
+
+# SQLite nests OR terms and caps expressions at a depth of 1000.
+SEATS_PER_QUERY = 400
+
+
+class SeatConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of these seats are already sold"
+    default_code = "seat_conflict"
+
+    def __init__(self, conflicts):
+        super().__init__()
+        self.conflicts = sorted(conflicts)
+        self.detail = {
+            "detail": self.default_detail,
+            "conflicts": [
+                {
+                    "journey": journey_id,
+                    "cargo": cargo,
+                    "seat": seat,
+                }
+                for journey_id, cargo, seat in self.conflicts
+            ],
+        }
+
+
+def lock_journeys(journey_ids):
+    """Serialize seat writes per journey until the transaction ends.
+
+    Rows are locked in primary key order so that orders spanning the
+    same journeys can't deadlock. Backends without SELECT ... FOR
+    UPDATE (SQLite) take their database-wide write lock with a no-op
+    update before anything is read.
+    """
+    journeys = Journey.objects.filter(pk__in=journey_ids)
+    if connection.features.has_select_for_update:
+        list(
+            journeys.select_for_update()
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+    else:
+        journeys.update(taken_seats=F("taken_seats"))
+
+
+def seats_filter(seats) -> Q:
+    """Match rows at any of the ``(journey_id, cargo, seat)`` seats."""
+    return reduce(
+        or_,
+        (
+            Q(journey_id=journey_id, cargo=cargo, seat=seat)
+            for journey_id, cargo, seat in seats
+        ),
+        Q(pk__in=[]),
+    )
+
+
+def seat_batches(seats):
+    """Split ``seats`` into batches small enough for one filter."""
+    iterator = iter(seats)
+    while batch := list(islice(iterator, SEATS_PER_QUERY)):
+        yield batch
+
+
+def sold_seats(seats) -> set:
+    sold = set()
+    for batch in seat_batches(seats):
+        sold.update(
+            Ticket.objects.filter(seats_filter(batch))
+            .order_by()
+            .values_list("journey_id", "cargo", "seat")
+        )
+    return sold
+
+
+def count_by_journey(tickets) -> Counter:
+    return Counter(ticket.journey_id for ticket in tickets)
+
+
+def invalidate_seat_maps(journey_ids):
+    journey_ids = set(journey_ids)
+
+    def invalidate():
+        for journey_id in journey_ids:
+            seat_maps.invalidate(journey_id)
+
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def take_seats(seats_by_journey: dict[int, int]):
+    for journey_id, taken in seats_by_journey.items():
+        Journey.objects.filter(pk=journey_id).update(
+            taken_seats=F("taken_seats") + taken,
+            seats_version=F("seats_version") + 1,
+        )
+    invalidate_seat_maps(seats_by_journey)
+    bump_versions("journey")
+
+
+def release_seats(seats_by_journey: dict[int, int]):
+    for journey_id, released in seats_by_journey.items():
+        Journey.objects.filter(pk=journey_id).update(
+            taken_seats=F("taken_seats") - released,
+            seats_version=F("seats_version") + 1,
+        )
+    invalidate_seat_maps(seats_by_journey)
+    bump_versions("journey")
+
+
+def rebuild_seat_counters() -> int:
+    tickets_count = (
+        Ticket.objects.filter(journey=OuterRef("pk"))
+        .order_by()
+        .values("journey")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    updated = Journey.objects.update(
+        taken_seats=Coalesce(Subquery(tickets_count), 0),
+        seats_version=F("seats_version") + 1,
+    )
+    bump_versions("journey")
+    return updated
@@ -0,0 +1,148 @@
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from app import settings
+from railroad.models import Job
+
+TASKS = {}
+
+RETRY_BACKOFF = timedelta(seconds=30)
+
+
+def task(name):
+    """Register a function as the handler of ``name`` jobs.
+
+    Handlers receive the job payload as keyword arguments. A job is
+    delivered at least once, so handlers must be safe to run again.
+    """
+
+    def register(function):
+        TASKS[name] = function
+        return function
+
+    return register
+
+
+def enqueue(name, payloads, delay=None):
+    """Queue one ``name`` job per payload.
+
+    Call it inside the transaction that makes the change the jobs act
+    on. The jobs then commit or roll back together with it, and
+    workers never see them before that change.
+    """
+    run_at = timezone.now() + (delay or timedelta())
+    Job.objects.bulk_create(
+        [
+            Job(
+                task=name,
+                payload=payload,
+                run_at=run_at,
+                max_attempts=settings.JOB_MAX_ATTEMPTS,
+            )
+            for payload in payloads
+        ]
+    )
+
+
+def expired_leases(now):
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_until__lte=now
+    )
+
+
+def due_jobs(now):
+    return Job.objects.filter(
+        Q(status=Job.PENDING, run_at__lte=now)
+        | Q(
+            status=Job.RUNNING,
+            locked_until__lte=now,
+            attempts__lt=F("max_attempts"),
+        )
+    )
+
+
+def claim(limit, timeout) -> list[tuple[int, object]]:
+    """Lease up to ``limit`` due jobs for ``timeout``.
+
+    Each job is taken with a conditional UPDATE on the state it was
+    read in, so concurrent workers never lease the same job twice.
+    Running jobs whose lease expired, e.g. after a worker crash, are
+    due again, or failed once they used up their attempts.
+    """
+    now = timezone.now()
+    lease = now + timeout
+    expired_leases(now).filter(
+        attempts__gte=F("max_attempts")
+    ).update(
+        status=Job.FAILED,
+        locked_until=None,
+        last_error="Lease expired on the last attempt",
+    )
+    candidates = (
+        due_jobs(now)
+        .order_by("run_at", "id")
+        .values_list("id", "status", "locked_until")[
+            : limit * 2
+        ]
+    )
+
+    claimed = []
+    for pk, status, locked_until in candidates:
+        updated = Job.objects.filter(
+            pk=pk, status=status, locked_until=locked_until
+        ).update(
+            status=Job.RUNNING,
+            locked_until=lease,
+            attempts=F("attempts") + 1,
+        )
+        if updated:
+            claimed.append((pk, lease))
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def retry_delay(attempts):
+    return RETRY_BACKOFF * 2 ** (attempts - 1)
+
+
+def run(pk, lease) -> bool:
+    """Run a leased job and record the outcome.
+
+    Finished jobs are deleted. Failed ones go back to pending with an
+    exponential backoff until ``max_attempts`` is used up. Nothing is
+    written once the lease has passed to another worker.
+    """
+    close_old_connections()
+    leased = Job.objects.filter(pk=pk, locked_until=lease)
+    job = leased.first()
+    if job is None:
+        return False
+
+    try:
+        handler = TASKS[job.task]
+        handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            leased.update(
+                status=Job.FAILED,
+                locked_until=None,
+                last_error=error,
+            )
+        else:
+            leased.update(
+                status=Job.PENDING,
+                locked_until=None,
+                run_at=timezone.now()
+                + retry_delay(job.attempts),
+                last_error=error,
+            )
+        return False
+
+    leased.delete()
+    return True
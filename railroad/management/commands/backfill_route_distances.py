@@ -0,0 +1,56 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from railroad.geo import haversine_km
+from railroad.models import Route
+from railroad.response_cache import bump_versions
+
+
+class Command(BaseCommand):
+    help = "Fill Route.distance with great-circle distances between stations"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute routes that already have a distance",
+        )
+
+    def handle(self, *args, **options):
+        routes = Route.objects.all()
+        if not options["all"]:
+            routes = routes.filter(distance__isnull=True)
+        rows = list(
+            routes.values_list(
+                "id",
+                "source__latitude",
+                "source__longitude",
+                "destination__latitude",
+                "destination__longitude",
+            )
+        )
+        if not rows:
+            self.stdout.write("No routes to update")
+            return
+
+        ids, *coordinates = zip(*rows)
+        distances = np.rint(
+            haversine_km(*map(np.asarray, coordinates))
+        ).astype(int)
+        updated = Route.objects.bulk_update(
+            [
+                Route(id=route_id, distance=int(distance))
+                for route_id, distance in zip(
+                    ids, distances
+                )
+            ],
+            ["distance"],
+            batch_size=1000,
+        )
+        # bulk_update() sends no signals
+        bump_versions("route")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Updated distance of {updated} routes"
+            )
+        )
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app import settings
+from railroad.network import build_network
+
+
+class Command(BaseCommand):
+    help = "Precompute shortest paths between all stations over routes"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        stations = build_network(settings.ROUTE_NETWORK_DIR)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built shortest paths between {stations} stations "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from railroad import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete expired order Idempotency-Key responses"
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(
+            f"Deleted {deleted} expired idempotency keys"
+        )
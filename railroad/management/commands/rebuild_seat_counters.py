@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from railroad import inventory
+
+
+class Command(BaseCommand):
+    help = "Recalculate Journey.taken_seats from existing tickets"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = inventory.rebuild_seat_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt seat counters for {updated} journeys"
+            )
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from railroad.models import Crew, Station, Train
+from railroad.renditions import enqueue_renditions
+
+
+class Command(BaseCommand):
+    help = "Queue rendition jobs for uploaded images without renditions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render images that already have renditions",
+        )
+
+    def handle(self, *args, **options):
+        queued = 0
+        for model in (Crew, Station, Train):
+            instances = model.objects.exclude(
+                image=""
+            ).exclude(image__isnull=True)
+            if not options["all"]:
+                instances = instances.filter(
+                    image_renditions={}
+                )
+            instances = list(instances.only("id", "image"))
+            enqueue_renditions(instances)
+            queued += len(instances)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Queued renditions of {queued} images"
+            )
+        )
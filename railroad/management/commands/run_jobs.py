@@ -0,0 +1,107 @@
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from app import settings
+from railroad import jobs
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs in a pool of processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="Seconds to wait between polls for new jobs",
+        )
+        parser.add_argument(
+            "--visibility-timeout",
+            type=float,
+            default=settings.JOB_VISIBILITY_TIMEOUT.total_seconds(),
+            help="Seconds a claimed job stays hidden from other "
+            "workers before it is retried",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due",
+        )
+
+    def handle(self, *args, **options):
+        processes = max(options["processes"], 1)
+        timeout = timedelta(
+            seconds=options["visibility_timeout"]
+        )
+        while True:
+            # Children must open their own database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=init_worker,
+            ) as pool:
+                try:
+                    self.work(
+                        pool, processes, timeout, options
+                    )
+                    return
+                except BrokenProcessPool:
+                    # Jobs of the dead pool are retried once their
+                    # leases expire.
+                    self.stderr.write(
+                        "A worker process died, restarting the pool"
+                    )
+
+    def work(self, pool, processes, timeout, options):
+        interval = options["interval"]
+        running = set()
+        while True:
+            free = processes - len(running)
+            if free:
+                for pk, lease in jobs.claim(free, timeout):
+                    running.add(
+                        pool.submit(jobs.run, pk, lease)
+                    )
+            if not running:
+                if options["once"]:
+                    return
+                time.sleep(interval)
+                continue
+
+            done, running = wait(
+                running,
+                timeout=interval,
+                return_when=FIRST_COMPLETED,
+            )
+            succeeded = sum(
+                future.result() for future in done
+            )
+            if done:
+                self.stdout.write(
+                    f"Finished {succeeded} jobs, "
+                    f"{len(done) - succeeded} failed"
+                )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from railroad import holds
+
+
+class Command(BaseCommand):
+    help = "Release expired seat holds"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep sweeping every INTERVAL seconds; "
+            "sweep once when omitted",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            released = holds.release_expired()
+            self.stdout.write(
+                f"Released {released} expired seat holds"
+            )
+            if not interval:
+                return
+            time.sleep(interval)
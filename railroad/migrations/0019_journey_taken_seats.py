@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:49
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_taken_seats(apps, schema_editor):
+    Journey = apps.get_model("railroad", "Journey")
+    Ticket = apps.get_model("railroad", "Ticket")
+    tickets_count = (
+        Ticket.objects.filter(journey=OuterRef("pk"))
+        .order_by()
+        .values("journey")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    Journey.objects.update(
+        taken_seats=Coalesce(Subquery(tickets_count), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "railroad",
+            "0018_crew_image_station_image_train_image",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="taken_seats",
+            field=models.PositiveIntegerField(
+                default=0, editable=False
+            ),
+        ),
+        migrations.RunPython(
+            fill_taken_seats, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railroad", "0022_journey_route_departure_idx"),
+        migrations.swappable_dependency(
+            settings.AUTH_USER_MODEL
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["departure_time", "id"],
+                name="journey_departure_id_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_at", "id"],
+                name="order_created_id_idx",
+            ),
+        ),
+    ]
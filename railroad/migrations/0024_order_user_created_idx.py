@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railroad", "0023_keyset_pagination_indexes"),
+        migrations.swappable_dependency(
+            settings.AUTH_USER_MODEL
+        ),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at"],
+                name="order_user_created_idx",
+            ),
+        ),
+    ]
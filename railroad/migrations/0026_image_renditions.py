@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railroad", "0025_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="crew",
+            name="image_renditions",
+            field=models.JSONField(
+                default=dict, editable=False
+            ),
+        ),
+        migrations.AddField(
+            model_name="station",
+            name="image_renditions",
+            field=models.JSONField(
+                default=dict, editable=False
+            ),
+        ),
+        migrations.AddField(
+            model_name="train",
+            name="image_renditions",
+            field=models.JSONField(
+                default=dict, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railroad", "0026_image_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="seats_version",
+            field=models.PositiveIntegerField(
+                default=0, editable=False
+            ),
+        ),
+    ]
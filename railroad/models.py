@@ -1,6 +1,7 @@
 from django.core import validators
 from django.db import models
 from django.db.models import F, Q
+from django.utils import timezone
 from rest_framework import status
 
 from app import settings
@@ -22,6 +23,24 @@ class Journey(models.Model):
     )
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    taken_seats = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+    seats_version = models.PositiveIntegerField(
+        default=0, editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("route", "departure_time"),
+                name="journey_route_departure_idx",
+            ),
+            models.Index(
+                fields=("departure_time", "id"),
+                name="journey_departure_id_idx",
+            ),
+        ]
 
     @property
     def total_time_hr(self):
@@ -34,14 +53,26 @@ class Journey(models.Model):
             2,
         )
 
-    @property
-    def taken_seats(self):
-        return self.tickets.count()
-
     @property
     def free_seats(self):
         return self.train.total_seats - self.taken_seats
 
+    def save(self, *args, **kwargs):
+        # Seat counters only change through F() updates, so a stale
+        # instance must not write them back.
+        if (
+            not self._state.adding
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name
+                not in ("taken_seats", "seats_version")
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.route} | {self.departure_time} -> {self.arrival_time}"
 
@@ -56,6 +87,18 @@ class Order(models.Model):
         related_name="orders",
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("created_at", "id"),
+                name="order_created_id_idx",
+            ),
+            models.Index(
+                fields=("user", "created_at"),
+                name="order_user_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return (
                 self.user.get_full_name()
@@ -64,6 +107,64 @@ class Order(models.Model):
         )
 
 
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "key"),
+                name="unique_idempotency_key_per_user",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} | {self.key}"
+
+
+class Job(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    )
+
+    task = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=1)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("status", "run_at"),
+                name="job_status_run_at_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
 class Ticket(models.Model):
     cargo = models.IntegerField()
     seat = models.IntegerField()
@@ -94,6 +195,42 @@ class Ticket(models.Model):
         ordering = ("journey__departure_time",)
 
 
+class SeatHold(models.Model):
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    journey = models.ForeignKey(
+        "Journey",
+        on_delete=models.CASCADE,
+        related_name="holds",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=(
+                    "cargo",
+                    "seat",
+                    "journey_id",
+                ),
+                name="unique_every_seat_hold",
+                violation_error_code=status.HTTP_400_BAD_REQUEST,
+                violation_error_message="Such seat is already held",
+            )
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.journey_id} | {self.cargo}:{self.seat} "
+            f"until {self.expires_at}"
+        )
+
+
 class Crew(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
@@ -107,6 +244,9 @@ class Crew(models.Model):
         upload_to=path_to_media,
         null=True
     )
+    image_renditions = models.JSONField(
+        default=dict, editable=False
+    )
 
     @property
     def full_name(self):
@@ -137,6 +277,9 @@ class Train(models.Model):
         upload_to=path_to_media,
         null=True
     )
+    image_renditions = models.JSONField(
+        default=dict, editable=False
+    )
 
     @property
     def total_seats(self):
@@ -154,6 +297,9 @@ class Station(models.Model):
         upload_to=path_to_media,
         null=True
     )
+    image_renditions = models.JSONField(
+        default=dict, editable=False
+    )
 
     class Meta:
         constraints = [
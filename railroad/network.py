@@ -0,0 +1,210 @@
+import os
+import shutil
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from app import settings
+from railroad.indexes import LazyIndex
+from railroad.models import Route, Station
+
+ARRAYS = ("stations", "distances", "next_hop")
+
+NetworkTable = namedtuple(
+    "NetworkTable", ("version", *ARRAYS)
+)
+
+
+class NetworkNotBuilt(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = (
+        "Shortest paths are not built yet, "
+        "run the build_route_network command"
+    )
+    default_code = "network_not_built"
+
+
+def shortest_paths(station_ids, edges):
+    """Floyd-Warshall over ``(source, destination, distance)`` edges.
+
+    Returns the distance matrix and a next-hop matrix holding, for
+    every pair, the index of the station to travel to first, or -1
+    when the destination can't be reached.
+    """
+    size = len(station_ids)
+    index = {
+        pk: position
+        for position, pk in enumerate(station_ids)
+    }
+    distances = np.full((size, size), np.inf)
+    np.fill_diagonal(distances, 0)
+    next_hop = np.full((size, size), -1, dtype=np.int32)
+    np.fill_diagonal(next_hop, np.arange(size))
+
+    if edges:
+        sources, destinations, weights = zip(*edges)
+        sources = np.array([index[pk] for pk in sources])
+        destinations = np.array(
+            [index[pk] for pk in destinations]
+        )
+        np.minimum.at(
+            distances, (sources, destinations), weights
+        )
+        next_hop[sources, destinations] = destinations
+
+    for via in range(size):
+        through = (
+            distances[:, via, None]
+            + distances[None, via, :]
+        )
+        shorter = through < distances
+        distances = np.where(shorter, through, distances)
+        next_hop = np.where(
+            shorter, next_hop[:, via, None], next_hop
+        )
+
+    return distances, next_hop
+
+
+def build_network(directory) -> int:
+    """Compute the tables and publish them as a new version.
+
+    Arrays are written to a fresh directory first and ``CURRENT`` is
+    swapped atomically afterwards, so readers never map a half-written
+    table.
+    """
+    directory = Path(directory)
+    station_ids = list(
+        Station.objects.order_by("id").values_list(
+            "id", flat=True
+        )
+    )
+    edges = list(
+        Route.objects.filter(
+            distance__isnull=False
+        ).values_list(
+            "source_id", "destination_id", "distance"
+        )
+    )
+    distances, next_hop = shortest_paths(station_ids, edges)
+
+    version = str(time.time_ns())
+    target = directory / version
+    target.mkdir(parents=True)
+    np.save(
+        target / "stations.npy",
+        np.array(station_ids, dtype=np.int64),
+    )
+    np.save(
+        target / "distances.npy",
+        distances.astype(np.float32),
+    )
+    np.save(target / "next_hop.npy", next_hop)
+
+    pointer = directory / "CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, directory / "CURRENT")
+
+    # The previous version is kept for workers that read CURRENT just
+    # before the swap; older ones are only held by open mappings,
+    # which stay valid after the files are unlinked.
+    versions = sorted(
+        (
+            path
+            for path in directory.iterdir()
+            if path.is_dir()
+        ),
+        key=lambda path: int(path.name),
+    )
+    for stale in versions[:-2]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return len(station_ids)
+
+
+class RouteNetwork(LazyIndex):
+    """Memory-mapped shortest path tables built by build_route_network.
+
+    Every worker maps the same files, so the operating system keeps a
+    single copy of the table in memory. A new build is picked up on the
+    next lookup.
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = Path(directory)
+
+    def current_version(self):
+        try:
+            return (
+                (self.directory / "CURRENT")
+                .read_text()
+                .strip()
+            )
+        except FileNotFoundError:
+            return None
+
+    def build(self):
+        version = self.current_version()
+        if version is None:
+            raise NetworkNotBuilt()
+        return NetworkTable(
+            version,
+            *(
+                np.load(
+                    self.directory
+                    / version
+                    / f"{name}.npy",
+                    mmap_mode="r",
+                )
+                for name in ARRAYS
+            ),
+        )
+
+    def get(self):
+        table = super().get()
+        if table.version != self.current_version():
+            self.invalidate()
+            table = super().get()
+        return table
+
+    def shortest_path(self, source, destination):
+        """Return ``(distance, station_ids)`` or None if unreachable.
+
+        Stations created after the last build are unknown to the table
+        and reported as unreachable too.
+        """
+        table = self.get()
+        positions = []
+        for pk in (source, destination):
+            position = int(
+                np.searchsorted(table.stations, pk)
+            )
+            if (
+                position == len(table.stations)
+                or table.stations[position] != pk
+            ):
+                return None
+            positions.append(position)
+
+        current, target = positions
+        if table.next_hop[current, target] < 0:
+            return None
+
+        path = [current]
+        while current != target:
+            current = int(table.next_hop[current, target])
+            path.append(current)
+        return (
+            int(table.distances[positions[0], target]),
+            [
+                int(table.stations[position])
+                for position in path
+            ],
+        )
+
+
+route_network = RouteNetwork(settings.ROUTE_NETWORK_DIR)
@@ -0,0 +1,172 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Pages ordered by the primary key, optionally after a datetime.
+
+    ``ordering`` is ``("id",)`` or ``(datetime_field, "id")``, with
+    the datetime a column of the paginated model itself. The cursor
+    carries the key of the last row served, so with an index on
+    ``ordering`` the next page is a range scan instead of an OFFSET,
+    and no COUNT(*) is needed.
+    """
+
+    ordering = ("created_at", "id")
+    descending = False
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(
+        self, queryset, request, view=None
+    ):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        lookup = "lt" if self.descending else "gt"
+        queryset = queryset.order_by(
+            *(
+                f"-{name}" if self.descending else name
+                for name in self.ordering
+            )
+        )
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            *values, pk = cursor
+            after = Q(**{f"id__{lookup}": pk})
+            for field, value in zip(self.ordering, values):
+                after = Q(
+                    **{f"{field}__{lookup}": value}
+                ) | Q(after, **{field: value})
+            queryset = queryset.filter(after)
+
+        page = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(
+                request.query_params[
+                    self.page_size_query_param
+                ]
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, instance):
+        if isinstance(instance, dict):
+            key = [
+                instance[field] for field in self.ordering
+            ]
+        else:
+            key = [
+                getattr(instance, field)
+                for field in self.ordering
+            ]
+        *values, pk = key
+        payload = json.dumps(
+            [value.isoformat() for value in values] + [pk]
+        )
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(
+            self.cursor_query_param
+        )
+        if encoded is None:
+            return None
+        try:
+            *values, pk = json.loads(
+                urlsafe_b64decode(encoded)
+            )
+            values = [
+                parse_datetime(value) for value in values
+            ]
+            if (
+                len(values) != len(self.ordering) - 1
+                or None in values
+                or not isinstance(pk, int)
+            ):
+                raise ValueError
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return (*values, pk)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {"next": self.get_next_link(), "results": data}
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class JourneyPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class TicketPagination(KeysetPagination):
+    ordering = ("id",)
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("created_at", "id")
+
+
+class OrderHistoryPagination(KeysetPagination):
+    ordering = ("created_at", "id")
+    descending = True
@@ -0,0 +1,24 @@
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    """Decode MessagePack bodies, Timestamps into aware datetimes."""
+
+    media_type = "application/msgpack"
+
+    def parse(
+        self, stream, media_type=None, parser_context=None
+    ):
+        try:
+            return msgpack.unpackb(
+                stream.read(), raw=False, timestamp=3
+            )
+        except (
+            ValueError,
+            msgpack.UnpackException,
+        ) as error:
+            raise ParseError(
+                f"MessagePack parse error - {error}"
+            )
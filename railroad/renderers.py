@@ -0,0 +1,62 @@
+import msgpack
+from django.utils.dateparse import parse_datetime
+from rest_framework.renderers import BaseRenderer
+
+DATETIME_FIELDS = frozenset(
+    (
+        "departure_time",
+        "arrival_time",
+        "created_at",
+        "expires_at",
+        "ordered_at",
+    )
+)
+
+
+def with_timestamps(data):
+    """Turn serialized datetimes back into datetime objects.
+
+    msgpack then packs them as its Timestamp extension: integer seconds
+    and nanoseconds instead of a 20 to 27 byte ISO 8601 string.
+    """
+    if isinstance(data, dict):
+        converted = {}
+        for key, value in data.items():
+            if key in DATETIME_FIELDS and isinstance(
+                value, str
+            ):
+                parsed = parse_datetime(value)
+                if (
+                    parsed is not None
+                    and parsed.tzinfo is not None
+                ):
+                    value = parsed
+            else:
+                value = with_timestamps(value)
+            converted[key] = value
+        return converted
+    if isinstance(data, list):
+        return [with_timestamps(item) for item in data]
+    return data
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(
+        self,
+        data,
+        accepted_media_type=None,
+        renderer_context=None,
+    ):
+        if data is None:
+            return b""
+        return msgpack.packb(
+            with_timestamps(data),
+            use_bin_type=True,
+            datetime=True,
+            default=str,
+        )
@@ -0,0 +1,121 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from railroad import jobs
+
+# Largest first: each size is downscaled from the previous one.
+RENDITION_SIZES = {
+    "large": (1280, 1280),
+    "medium": (640, 640),
+    "thumb": (160, 160),
+}
+
+RENDITION_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {
+        "format": "JPEG",
+        "quality": 82,
+        "optimize": True,
+        "progressive": True,
+    },
+}
+
+
+def rendition_name(name, size, extension):
+    path = PurePosixPath(name)
+    return str(
+        path.parent
+        / "renditions"
+        / f"{path.stem}-{size}.{extension}"
+    )
+
+
+def flatten(image):
+    """Drop alpha onto a white background; JPEG has no alpha."""
+    if image.mode == "RGB":
+        return image
+    image = image.convert("RGBA")
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def encode(image, options):
+    buffer = BytesIO()
+    image.save(buffer, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def render(storage, name) -> dict:
+    """Write every size and format of the image ``name`` to ``storage``.
+
+    Returns the stored names as ``{size: {extension: name}}``.
+    """
+    with storage.open(name, "rb") as file:
+        image = Image.open(file)
+        # Lets the JPEG decoder downscale while decoding.
+        image.draft("RGB", RENDITION_SIZES["large"])
+        image = flatten(ImageOps.exif_transpose(image))
+
+    renditions = {}
+    for size, box in RENDITION_SIZES.items():
+        image.thumbnail(box, Image.Resampling.LANCZOS)
+        renditions[size] = {}
+        for extension, options in RENDITION_FORMATS.items():
+            target = rendition_name(name, size, extension)
+            # A retried job overwrites what an earlier attempt wrote.
+            storage.delete(target)
+            renditions[size][extension] = storage.save(
+                target, encode(image, options)
+            )
+    return renditions
+
+
+def delete_renditions(storage, renditions):
+    for names in renditions.values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def rendition_urls(storage, renditions, request=None):
+    urls = {}
+    for size, names in renditions.items():
+        urls[size] = {}
+        for extension, name in names.items():
+            url = storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[size][extension] = url
+    return urls
+
+
+def save_image(serializer):
+    """Save an uploaded image and queue its renditions.
+
+    Renditions of the replaced image are deleted from storage.
+    """
+    previous = serializer.instance.image_renditions
+    instance = serializer.save(image_renditions={})
+    delete_renditions(
+        instance._meta.get_field("image").storage, previous
+    )
+    enqueue_renditions([instance])
+
+
+def enqueue_renditions(instances):
+    """Queue rendering of the current image of each instance."""
+    jobs.enqueue(
+        "images.render_renditions",
+        (
+            {
+                "model": instance._meta.label_lower,
+                "pk": instance.pk,
+                "image": instance.image.name,
+            }
+            for instance in instances
+            if instance.image
+        ),
+    )
@@ -0,0 +1,174 @@
+import hashlib
+import time
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from app import settings
+
+
+def version_key(name):
+    return f"railroad:version:{name}"
+
+
+def version_cache():
+    return caches["versions"]
+
+
+def get_versions(names):
+    versions_cache = version_cache()
+    keys = [version_key(name) for name in names]
+    versions = versions_cache.get_many(keys)
+    missing = {
+        key: time.time_ns()
+        for key in keys
+        if key not in versions
+    }
+    for key, version in missing.items():
+        # add() keeps a version another worker set in the meantime
+        if not versions_cache.add(
+            key, version, timeout=None
+        ):
+            missing[key] = versions_cache.get(key, version)
+    versions.update(missing)
+    return [str(versions[key]) for key in keys]
+
+
+def bump_versions(*names):
+    """Give ``names`` new versions, now and again after commit.
+
+    The second bump discards entries cached from reads that ran before
+    the transaction committed.
+    """
+
+    def bump():
+        version_cache().set_many(
+            {
+                version_key(name): time.time_ns()
+                for name in names
+            },
+            timeout=None,
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+class VersionedViewMixin:
+    """Track the data versions a viewset's responses are built from.
+
+    ``cache_versions`` names every kind of row the responses read.
+    Saving or deleting such a row bumps its version.
+    """
+
+    cache_versions = ()
+
+    def get_data_versions(self):
+        if not hasattr(self, "_data_versions"):
+            self._data_versions = get_versions(
+                self.cache_versions
+            )
+        return self._data_versions
+
+    def get_representation_digest(self, request):
+        return hashlib.sha256(
+            request.build_absolute_uri().encode()
+        ).hexdigest()
+
+
+class CachedResponseMixin(VersionedViewMixin):
+    """Cache ``list`` and ``retrieve`` responses under data versions.
+
+    Stale entries are never served, since any write moves the key on,
+    and simply age out of the cache.
+    """
+
+    def get_response_cache_key(self, request):
+        digest = self.get_representation_digest(request)
+        versions = "-".join(self.get_data_versions())
+        return (
+            f"railroad:response:{self.basename}:{self.action}:"
+            f"{versions}:{digest}"
+        )
+
+    def cached_response(
+        self, view, request, *args, **kwargs
+    ):
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            return Response(cached)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key,
+                response.data,
+                settings.RESPONSE_CACHE_TIMEOUT,
+            )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(VersionedViewMixin):
+    """ETag and Last-Modified for ``list`` and ``retrieve``.
+
+    Both come from the data versions, so a matching ``If-None-Match``
+    or ``If-Modified-Since`` is answered with 304 before any query.
+    """
+
+    def get_validators(self, request):
+        versions = self.get_data_versions()
+        etag = hashlib.sha256(
+            ":".join(
+                (
+                    self.basename,
+                    self.action,
+                    request.accepted_renderer.media_type,
+                    self.get_representation_digest(request),
+                    *versions,
+                )
+            ).encode()
+        ).hexdigest()
+        last_modified = max(map(int, versions)) // 10**9
+        return quote_etag(etag), last_modified
+
+    def conditional_response(
+        self, view, request, *args, **kwargs
+    ):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault(
+            "Last-Modified", http_date(last_modified)
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
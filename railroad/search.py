@@ -0,0 +1,145 @@
+import re
+import unicodedata
+from bisect import bisect_left
+from itertools import islice
+
+from railroad.indexes import LazyIndex
+from railroad.models import Station, TrainType
+
+TRANSLITERATION = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "h",
+        "ґ": "g",
+        "д": "d",
+        "е": "e",
+        "є": "ie",
+        "ж": "zh",
+        "з": "z",
+        "и": "y",
+        "і": "i",
+        "ї": "i",
+        "й": "i",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "ts",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ь": "",
+        "ю": "iu",
+        "я": "ia",
+        "ё": "e",
+        "ы": "y",
+        "э": "e",
+        "ъ": "",
+        "'": "",
+        "’": "",
+        "ʼ": "",
+    }
+)
+
+NON_WORD = re.compile(r"[\W_]+")
+
+MAX_SCANNED = 1000
+
+
+def normalize(text):
+    """Fold case, diacritics and Cyrillic script into plain Latin words."""
+    text = text.casefold().translate(TRANSLITERATION)
+    text = "".join(
+        char
+        for char in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(char)
+    )
+    return NON_WORD.sub(" ", text).strip()
+
+
+def name_keys(name):
+    words = normalize(name).split()
+    return [
+        " ".join(words[start:])
+        for start in range(len(words))
+    ]
+
+
+class StationNameIndex(LazyIndex):
+    """Sorted array of normalized station names and their word suffixes.
+
+    Every key starts at a word boundary, so a prefix lookup matches the
+    beginning of the name or of any later word in it.
+    """
+
+    versions = ("station",)
+
+    def build(self):
+        stations = Station.objects.values_list("id", "name")
+        return sorted(
+            (key, position, name, station_id)
+            for station_id, name in stations
+            for position, key in enumerate(name_keys(name))
+        )
+
+    def autocomplete(self, query, limit):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        keys = self.get()
+        start = bisect_left(keys, (prefix,))
+        matches = []
+        for key, position, name, station_id in islice(
+            keys, start, start + MAX_SCANNED
+        ):
+            if not key.startswith(prefix):
+                break
+            matches.append((position > 0, name, station_id))
+
+        found = {}
+        for _, name, station_id in sorted(matches):
+            found.setdefault(
+                station_id, {"id": station_id, "name": name}
+            )
+            if len(found) == limit:
+                break
+        return list(found.values())
+
+
+class NameLookup(LazyIndex):
+    """Case-insensitive substring lookup of model ids by name."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.versions = (model._meta.model_name,)
+
+    def build(self):
+        return [
+            (name.casefold(), pk)
+            for pk, name in self.model.objects.values_list(
+                "id", "name"
+            )
+        ]
+
+    def ids_containing(self, term):
+        term = term.casefold()
+        return {
+            pk for name, pk in self.get() if term in name
+        }
+
+
+station_names = StationNameIndex()
+station_lookup = NameLookup(Station)
+train_type_lookup = NameLookup(TrainType)
@@ -0,0 +1,106 @@
+import base64
+import threading
+from collections import OrderedDict
+
+from railroad.models import Ticket
+
+
+class SeatMap:
+    """Occupancy bitmap of a journey, one bit per (cargo, seat).
+
+    Cells are laid out cargo by cargo, seat by seat, most significant
+    bit first: the cell of (cargo, seat) is
+    ``(cargo - 1) * places_in_cargo + (seat - 1)``.
+    """
+
+    def __init__(self, cargo_num, places_in_cargo, bitmap):
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        self.bitmap = bytes(bitmap)
+
+    @classmethod
+    def from_seats(cls, cargo_num, places_in_cargo, seats):
+        total = cargo_num * places_in_cargo
+        bitmap = bytearray((total + 7) // 8)
+        for cargo, seat in seats:
+            if not (
+                1 <= cargo <= cargo_num
+                and 1 <= seat <= places_in_cargo
+            ):
+                continue
+            cell = (cargo - 1) * places_in_cargo + seat - 1
+            bitmap[cell >> 3] |= 0x80 >> (cell & 7)
+        return cls(cargo_num, places_in_cargo, bitmap)
+
+    def is_taken(self, cargo, seat):
+        cell = (cargo - 1) * self.places_in_cargo + seat - 1
+        return bool(
+            self.bitmap[cell >> 3] & (0x80 >> (cell & 7))
+        )
+
+    def taken_by_cargo(self):
+        return [
+            [
+                seat
+                for seat in range(
+                    1, self.places_in_cargo + 1
+                )
+                if self.is_taken(cargo, seat)
+            ]
+            for cargo in range(1, self.cargo_num + 1)
+        ]
+
+    def encode(self):
+        return base64.b64encode(self.bitmap).decode("ascii")
+
+
+class SeatMapCache:
+    """In-process LRU of journey seat maps.
+
+    Maps are kept with the ``seats_version`` of the journey they were
+    built for. Every ticket write bumps that version in the database,
+    so a journey read by any process after the write no longer
+    matches and its map is rebuilt. ``invalidate()`` drops the map of
+    this process only.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._maps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, journey):
+        train = journey.train
+        key = (
+            journey.seats_version,
+            train.cargo_num,
+            train.places_in_cargo,
+        )
+        with self._lock:
+            cached = self._maps.get(journey.pk)
+            if cached is not None and cached[0] == key:
+                self._maps.move_to_end(journey.pk)
+                return cached[1]
+
+        seats = (
+            Ticket.objects.filter(journey_id=journey.pk)
+            .order_by()
+            .values_list("cargo", "seat")
+        )
+        seat_map = SeatMap.from_seats(
+            train.cargo_num, train.places_in_cargo, seats
+        )
+
+        with self._lock:
+            self._maps[journey.pk] = (key, seat_map)
+            self._maps.move_to_end(journey.pk)
+            if len(self._maps) > self.maxsize:
+                self._maps.popitem(last=False)
+        return seat_map
+
+    def invalidate(self, journey_id):
+        with self._lock:
+            self._maps.pop(journey_id, None)
+
+
+seat_maps = SeatMapCache()
@@ -1,13 +1,24 @@
 from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 
-from railroad import validators
+from app import settings
+from railroad import (
+    allocation,
+    geo,
+    holds,
+    inventory,
+    jobs,
+    renditions,
+    validators,
+)
 from railroad.models import (
     Crew,
     Journey,
     Order,
     Route,
+    SeatHold,
     Station,
     Ticket,
     Train,
@@ -15,6 +26,18 @@ from railroad.models import (
 )
 
 
+class ImageRenditionsField(serializers.ReadOnlyField):
+    """URLs of the resized copies of ``image`` by size and format."""
+
+    def to_representation(self, value):
+        storage = self.parent.Meta.model._meta.get_field(
+            "image"
+        ).storage
+        return renditions.rendition_urls(
+            storage, value, self.context.get("request")
+        )
+
+
 class TrainTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainType
@@ -24,7 +47,7 @@ class TrainTypeSerializer(serializers.ModelSerializer):
 class TrainSerializer(serializers.ModelSerializer):
     class Meta:
         model = Train
-        exclude = ("train_type",)
+        exclude = ("train_type", "image_renditions")
 
 
 class TrainDetailSerializer(serializers.ModelSerializer):
@@ -32,6 +55,7 @@ class TrainDetailSerializer(serializers.ModelSerializer):
         source="train_type", read_only=True
     )
     total_seats = serializers.IntegerField(read_only=True)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Train
@@ -43,6 +67,7 @@ class TrainListSerializer(serializers.ModelSerializer):
         source="train_type.name"
     )
     total_seats = serializers.IntegerField(read_only=True)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Train
@@ -58,13 +83,22 @@ class TrainImageSerializer(serializers.ModelSerializer):
 class StationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Station
-        exclude = ("image",)
+        exclude = ("image", "image_renditions")
 
 
 class StationListDetailSerializer(serializers.ModelSerializer):
+    image_renditions = ImageRenditionsField()
+
     class Meta:
         model = Station
-        fields = "__all__"
+        fields = (
+            "id",
+            "name",
+            "latitude",
+            "longitude",
+            "image",
+            "image_renditions",
+        )
 
 
 class StationImageSerializer(serializers.ModelSerializer):
@@ -73,6 +107,91 @@ class StationImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
+class DistanceMatrixSearchSerializer(serializers.Serializer):
+    ids = serializers.CharField(
+        help_text="Comma separated station ids"
+    )
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(pk) for pk in value.split(",") if pk.strip()]
+        except ValueError:
+            raise ValidationError("Station ids must be integers")
+        ids = list(dict.fromkeys(ids))
+        if not 1 <= len(ids) <= 500:
+            raise ValidationError("Pass from 1 to 500 station ids")
+        return ids
+
+
+class DistanceMatrixSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField())
+    matrix = serializers.ListField(
+        child=serializers.ListField(
+            child=serializers.FloatField()
+        ),
+        help_text="Great-circle distances in kilometers",
+    )
+
+
+class NearbySearchSerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(
+        min_value=0,
+        default=50,
+        help_text="Search radius in kilometers",
+    )
+    k = serializers.IntegerField(
+        min_value=1, max_value=100, default=10
+    )
+
+
+class AutocompleteSearchSerializer(serializers.Serializer):
+    q = serializers.CharField()
+    limit = serializers.IntegerField(
+        min_value=1, max_value=50, default=10
+    )
+
+
+class StationNameSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+
+
+class NearbyStationSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    distance = serializers.FloatField(
+        help_text="Great-circle distance in kilometers"
+    )
+
+
+class ShortestPathSearchSerializer(serializers.Serializer):
+    to = serializers.IntegerField(min_value=1)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a keyword, so it can't be declared as an attribute
+        fields["from"] = serializers.IntegerField(min_value=1)
+        return fields
+
+    def validate(self, attrs):
+        if attrs["from"] == attrs["to"]:
+            raise ValidationError(
+                "Source and Destination cannot be the same station."
+            )
+        return attrs
+
+
+class ShortestPathSerializer(serializers.Serializer):
+    distance = serializers.IntegerField(
+        help_text="Total route distance"
+    )
+    stations = StationNameSerializer(many=True)
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
@@ -86,6 +205,14 @@ class RouteSerializer(serializers.ModelSerializer):
             )
         return super().validate(attrs)
 
+    def create(self, validated_data):
+        if validated_data.get("distance") is None:
+            validated_data["distance"] = geo.route_distance(
+                validated_data["source"],
+                validated_data["destination"],
+            )
+        return super().create(validated_data)
+
 
 class RouteDetailSerializer(serializers.ModelSerializer):
     source = StationSerializer(read_only=True)
@@ -117,7 +244,7 @@ class JourneySerializer(
 
     class Meta:
         model = Journey
-        fields = "__all__"
+        exclude = ("seats_version",)
 
 
 class JourneyListSerializer(JourneySerializer):
@@ -126,22 +253,95 @@ class JourneyListSerializer(JourneySerializer):
     taken_seats = serializers.IntegerField(read_only=True)
     free_seats = serializers.IntegerField(read_only=True)
 
+    field_relations = {"free_seats": ("train",)}
+
 
 class JourneyDetailSerializer(JourneySerializer):
     route = RouteDetailSerializer(read_only=True)
     train = TrainDetailSerializer(read_only=True)
 
 
+class ConnectionSearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(min_value=1)
+    destination = serializers.IntegerField(min_value=1)
+    departure_after = serializers.DateTimeField(
+        default=timezone.now
+    )
+    min_transfer = serializers.IntegerField(
+        min_value=0,
+        default=int(
+            settings.MIN_TRANSFER_TIME.total_seconds() // 60
+        ),
+        help_text="Minimum connection time in minutes",
+    )
+    max_transfers = serializers.IntegerField(
+        min_value=0, max_value=5, default=2
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=10, default=3
+    )
+
+    def validate(self, attrs):
+        if attrs["source"] == attrs["destination"]:
+            raise ValidationError(
+                "Source and Destination cannot be the same station."
+            )
+        return attrs
+
+
+class BoardSearchSerializer(serializers.Serializer):
+    hours = serializers.IntegerField(
+        min_value=1, max_value=24, default=3
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=100, default=20
+    )
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields["from"] = serializers.DateTimeField(
+            default=timezone.now
+        )
+        return fields
+
+
+class ExportSearchSerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=("csv", "ndjson"), default="csv"
+    )
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    legs = JourneyListSerializer(many=True)
+
+
+class SeatMapSerializer(serializers.Serializer):
+    journey = serializers.IntegerField()
+    cargo_num = serializers.IntegerField()
+    places_in_cargo = serializers.IntegerField()
+    bitmap = serializers.CharField()
+    cargos = serializers.ListField(
+        child=serializers.ListField(
+            child=serializers.IntegerField()
+        ),
+        required=False,
+    )
+
+
 class CrewSerializer(serializers.ModelSerializer):
     full_name = serializers.CharField(read_only=True)
 
     class Meta:
         model = Crew
-        exclude = ("image",)
+        exclude = ("image", "image_renditions")
 
 
 class CrewListSerializer(serializers.ModelSerializer):
     full_name = serializers.CharField(read_only=True)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Crew
@@ -150,6 +350,7 @@ class CrewListSerializer(serializers.ModelSerializer):
 
 class CrewDetailSerializer(serializers.ModelSerializer):
     journey = JourneyDetailSerializer(read_only=True)
+    image_renditions = ImageRenditionsField()
 
     class Meta:
         model = Crew
@@ -159,6 +360,7 @@ class CrewDetailSerializer(serializers.ModelSerializer):
             "last_name",
             "full_name",
             "image",
+            "image_renditions",
             "journey",
         )
         extra_kwargs = {"full_name": {"read_only": True}}
@@ -170,17 +372,64 @@ class CrewImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
+class JourneyIdField(serializers.IntegerField):
+    """Journey primary key resolved in bulk by the parent serializer."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("min_value", 1)
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance.journey_id
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    journey = JourneyIdField()
+
     class Meta:
         model = Ticket
-        exclude = ("order",)
+        fields = ("id", "cargo", "seat", "journey")
+
+
+class SeatHoldListSerializer(
+    validators.SeatHoldValidatorMixin,
+    serializers.ListSerializer,
+):
+    def create(self, validated_data):
+        return holds.hold_seats(
+            self.context["request"].user, validated_data
+        )
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    journey = JourneyIdField()
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "cargo", "seat", "journey", "expires_at")
+        read_only_fields = ("expires_at",)
+        list_serializer_class = SeatHoldListSerializer
+
+
+class SeatRequestSerializer(serializers.Serializer):
+    journey = JourneyIdField()
+    seats = serializers.IntegerField(min_value=1)
+    together = serializers.BooleanField(default=True)
 
 
 class OrderSerializer(
     validators.OrderValidatorMixin,
     serializers.ModelSerializer,
 ):
-    tickets = TicketSerializer(many=True)
+    tickets = TicketSerializer(many=True, required=False)
+    holds = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        write_only=True,
+    )
+    seat_requests = SeatRequestSerializer(
+        many=True, required=False, write_only=True
+    )
 
     # user = serializers.HiddenField(
     #     default=serializers.CurrentUserDefault()
@@ -188,20 +437,89 @@ class OrderSerializer(
     class Meta:
         model = Order
         fields = "__all__"
-        extra_kwargs = {"created_at": {"read_only": True}}
+        extra_kwargs = {
+            "created_at": {"read_only": True},
+            "user": {"read_only": True},
+        }
 
-    def create(self, validated_data):
-        tickets_data = validated_data.pop("tickets")
+    def validate(self, attrs):
+        self.resolve_references(attrs)
+        attrs["tickets"] = attrs.get("tickets", []) + [
+            {
+                "cargo": hold.cargo,
+                "seat": hold.seat,
+                "journey": hold.journey,
+            }
+            for hold in attrs.get("holds", [])
+        ]
+        attrs["tickets"] += allocation.allocate_tickets(
+            attrs.get("seat_requests", []),
+            attrs["tickets"],
+            self.get_buyer(attrs),
+            self.context.get("reserved", ()),
+        )
+        if not attrs["tickets"]:
+            raise ValidationError(
+                "Order must contain at least one ticket"
+            )
+        return super().validate(attrs)
+
+    @staticmethod
+    def bulk_create(orders_data) -> list[Order]:
+        orders_data = [
+            {
+                key: value
+                for key, value in data.items()
+                if key not in ("holds", "seat_requests")
+            }
+            for data in orders_data
+        ]
+        tickets_data = [data.pop("tickets") for data in orders_data]
+
+        seats = {
+            (item["journey"].id, item["cargo"], item["seat"])
+            for items in tickets_data
+            for item in items
+        }
 
         with transaction.atomic():
-            order = Order.objects.create(**validated_data)
+            inventory.lock_journeys(
+                {journey_id for journey_id, _, _ in seats}
+            )
+            if conflicts := inventory.sold_seats(seats):
+                raise inventory.SeatConflict(conflicts)
+            orders = Order.objects.bulk_create(
+                [Order(**data) for data in orders_data]
+            )
             tickets_to_create = [
                 Ticket(order=order, **item)
-                for item in tickets_data
+                for order, items in zip(orders, tickets_data)
+                for item in items
             ]
+            for user_id in {order.user_id for order in orders}:
+                for batch in inventory.seat_batches(
+                    item
+                    for order, items in zip(orders, tickets_data)
+                    if order.user_id == user_id
+                    for item in items
+                ):
+                    SeatHold.objects.filter(
+                        holds.seats_filter(batch),
+                        user_id=user_id,
+                    ).delete()
             Ticket.objects.bulk_create(tickets_to_create)
+            inventory.take_seats(
+                inventory.count_by_journey(tickets_to_create)
+            )
+            jobs.enqueue(
+                "orders.send_confirmation",
+                ({"order_id": order.id} for order in orders),
+            )
+
+        return orders
 
-        return order
+    def create(self, validated_data):
+        return self.bulk_create([validated_data])[0]
 
 
 class TicketListSerializer(serializers.ModelSerializer):
@@ -220,3 +538,27 @@ class TicketDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = "__all__"
+
+
+class OrderHistoryTicketSerializer(serializers.ModelSerializer):
+    journey = JourneyListSerializer(read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = ("id", "cargo", "seat", "journey")
+
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    tickets = OrderHistoryTicketSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ("id", "created_at", "tickets")
+
+
+class OrderHistorySummarySerializer(serializers.Serializer):
+    orders = serializers.IntegerField()
+    tickets = serializers.IntegerField()
+    journeys = serializers.IntegerField()
+    upcoming_journeys = serializers.IntegerField()
+    next_departure = serializers.DateTimeField(allow_null=True)
@@ -0,0 +1,87 @@
+from django.db.models import Count, QuerySet
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from railroad import inventory, response_cache
+from railroad.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from railroad.timetable import journey_boards
+
+
+@receiver(post_save, sender=Ticket)
+def take_ticket_seat(sender, instance, created, **kwargs):
+    if created:
+        inventory.take_seats({instance.journey_id: 1})
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, origin, **kwargs):
+    # Order deletes release their tickets at once, and the counters
+    # of a deleted journey no longer matter.
+    if isinstance(origin, Ticket) or (
+        isinstance(origin, QuerySet)
+        and origin.model is Ticket
+    ):
+        inventory.release_seats({instance.journey_id: 1})
+
+
+@receiver(pre_delete, sender=Order)
+def release_order_seats(sender, instance, **kwargs):
+    seats_by_journey = dict(
+        instance.tickets.order_by()
+        .values("journey")
+        .annotate(count=Count("pk"))
+        .values_list("journey", "count")
+    )
+    if seats_by_journey:
+        inventory.release_seats(seats_by_journey)
+
+
+@receiver(post_save, sender=Journey)
+def invalidate_journey_seat_map(sender, instance, **kwargs):
+    inventory.invalidate_seat_maps([instance.pk])
+
+
+@receiver(pre_save, sender=Journey)
+@receiver(pre_delete, sender=Journey)
+def remember_journey_boards(sender, instance, **kwargs):
+    instance._previous_boards = (
+        journey_boards(instance.pk)
+        if instance.pk
+        else set()
+    )
+
+
+@receiver(post_save, sender=Journey)
+@receiver(post_delete, sender=Journey)
+def bump_journey_schedule(sender, instance, **kwargs):
+    boards = getattr(instance, "_previous_boards", set())
+    if kwargs["signal"] is post_save:
+        boards = boards | journey_boards(instance.pk)
+    response_cache.bump_versions("timetable", *boards)
+
+
+@receiver(post_save, sender=Journey)
+@receiver(post_delete, sender=Journey)
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Train)
+@receiver(post_delete, sender=Train)
+@receiver(post_save, sender=TrainType)
+@receiver(post_delete, sender=TrainType)
+def bump_model_version(sender, **kwargs):
+    response_cache.bump_versions(sender._meta.model_name)
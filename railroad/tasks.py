@@ -0,0 +1,61 @@
+from django.apps import apps
+from django.core.mail import send_mail
+from django.db.models import Prefetch
+
+from railroad import renditions
+from railroad.jobs import task
+from railroad.models import Order, Ticket
+from railroad.response_cache import bump_versions
+
+
+@task("orders.send_confirmation")
+def send_order_confirmation(order_id):
+    order = (
+        Order.objects.select_related("user")
+        .prefetch_related(
+            Prefetch(
+                "tickets",
+                queryset=Ticket.objects.select_related(
+                    "journey__route__source",
+                    "journey__route__destination",
+                ),
+            )
+        )
+        .filter(pk=order_id)
+        .first()
+    )
+    if order is None:
+        return
+
+    lines = [
+        f"Order #{order.id} placed at {order.created_at}",
+        "",
+        *(
+            f"{ticket.journey.route} | "
+            f"{ticket.journey.departure_time} | "
+            f"cargo {ticket.cargo}, seat {ticket.seat}"
+            for ticket in order.tickets.all()
+        ),
+    ]
+    send_mail(
+        subject=f"Your order #{order.id}",
+        message="\n".join(lines),
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
+
+
+@task("images.render_renditions")
+def render_image_renditions(model, pk, image):
+    model = apps.get_model(model)
+    storage = model._meta.get_field("image").storage
+    current = model.objects.filter(pk=pk, image=image)
+    if not current.exists():
+        return
+
+    rendered = renditions.render(storage, image)
+    if not current.update(image_renditions=rendered):
+        # The image was replaced while rendering.
+        renditions.delete_renditions(storage, rendered)
+        return
+    bump_versions(model._meta.model_name)
@@ -1,3 +1,585 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from app import settings
+from railroad import inventory
+from railroad.models import (
+    Journey,
+    Order,
+    Route,
+    SeatHold,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from railroad.response_cache import get_versions
+from railroad.seat_map import SeatMapCache
+from railroad.serializers import (
+    JourneyListSerializer,
+    TicketListSerializer,
+)
+from railroad.timetable import Timetable
+
+HOLDS_URL = "/api/v1/railroad/holds/"
+ORDERS_URL = "/api/v1/railroad/orders/"
+BULK_ORDERS_URL = "/api/v1/railroad/orders/bulk/"
+JOURNEYS_URL = "/api/v1/railroad/journeys/"
+TICKETS_URL = "/api/v1/railroad/tickets/"
+
+TEST_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "railroad-tests",
+    },
+    "versions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "railroad-tests-versions",
+    },
+}
+
+
+def sample_journey(**params):
+    kyiv, _ = Station.objects.get_or_create(
+        name="kyiv",
+        defaults={"latitude": 50.44, "longitude": 30.49},
+    )
+    lviv, _ = Station.objects.get_or_create(
+        name="lviv",
+        defaults={"latitude": 49.84, "longitude": 24.0},
+    )
+    route, _ = Route.objects.get_or_create(
+        source=kyiv,
+        destination=lviv,
+        defaults={"distance": 470},
+    )
+    train_type, _ = TrainType.objects.get_or_create(
+        name="Intercity"
+    )
+    train = Train.objects.create(
+        name="Hyundai",
+        cargo_num=2,
+        places_in_cargo=4,
+        train_type=train_type,
+    )
+    departure = timezone.now() + timedelta(days=1)
+    defaults = {
+        "route": route,
+        "train": train,
+        "departure_time": departure,
+        "arrival_time": departure + timedelta(hours=5),
+    }
+    defaults.update(params)
+    return Journey.objects.create(**defaults)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RailroadTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@railroad.test", password="password"
+        )
+        self.staff = get_user_model().objects.create_user(
+            email="staff@railroad.test",
+            password="password",
+            is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.journey = sample_journey()
+
+
+class SeatHoldTests(RailroadTestCase):
+    def hold(self, *seats):
+        return self.client.post(
+            HOLDS_URL,
+            [
+                {
+                    "journey": self.journey.id,
+                    "cargo": cargo,
+                    "seat": seat,
+                }
+                for cargo, seat in seats
+            ],
+            format="json",
+        )
+
+    def test_non_staff_cannot_hold_seats(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.hold((1, 1))
+
+        self.assertEqual(
+            response.status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    @mock.patch.object(
+        settings, "SEAT_HOLD_MAX_PER_REQUEST", 2
+    )
+    def test_holds_per_request_are_capped(self):
+        response = self.hold((1, 1), (1, 2), (1, 3))
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertFalse(SeatHold.objects.exists())
+
+    @mock.patch.object(
+        settings, "SEAT_HOLD_MAX_PER_USER", 3
+    )
+    def test_active_holds_per_user_are_capped(self):
+        self.assertEqual(
+            self.hold((1, 1), (1, 2)).status_code,
+            status.HTTP_201_CREATED,
+        )
+
+        response = self.hold((2, 1), (2, 2))
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(SeatHold.objects.count(), 2)
+
+    @mock.patch.object(
+        settings, "SEAT_HOLD_MAX_PER_USER", 2
+    )
+    def test_renewing_own_holds_is_not_capped(self):
+        self.hold((1, 1), (1, 2))
+
+        response = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(
+            response.status_code, status.HTTP_201_CREATED
+        )
+        self.assertEqual(SeatHold.objects.count(), 2)
+
+
+class SeatMapCacheTests(RailroadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = Order.objects.create(user=self.staff)
+        Ticket.objects.create(
+            journey=self.journey,
+            order=self.order,
+            cargo=1,
+            seat=1,
+        )
+        # Separate from the shared cache, so it sees no local
+        # invalidations, like the cache of another process.
+        self.seat_maps = SeatMapCache()
+
+    def seat_map(self):
+        journey = Journey.objects.get(pk=self.journey.pk)
+        return self.seat_maps.get(journey)
+
+    def test_map_is_rebuilt_after_a_release_and_a_sale(
+        self,
+    ):
+        self.assertTrue(self.seat_map().is_taken(1, 1))
+
+        Ticket.objects.filter(journey=self.journey).delete()
+        Ticket.objects.create(
+            journey=self.journey,
+            order=self.order,
+            cargo=1,
+            seat=2,
+        )
+
+        seat_map = self.seat_map()
+        self.assertFalse(seat_map.is_taken(1, 1))
+        self.assertTrue(seat_map.is_taken(1, 2))
+
+    def test_unchanged_map_is_served_without_reading_tickets(
+        self,
+    ):
+        self.seat_map()
+        journey = Journey.objects.get(pk=self.journey.pk)
+
+        # Only the train of the journey is loaded.
+        with self.assertNumQueries(1):
+            self.seat_maps.get(journey)
+
+    def test_saving_a_stale_journey_keeps_seat_counters(
+        self,
+    ):
+        stale = Journey.objects.get(pk=self.journey.pk)
+        Ticket.objects.create(
+            journey=self.journey,
+            order=self.order,
+            cargo=1,
+            seat=2,
+        )
+
+        stale.save()
+
+        journey = Journey.objects.get(pk=self.journey.pk)
+        self.assertEqual(journey.taken_seats, 2)
+        self.assertGreater(
+            journey.seats_version, stale.seats_version
+        )
+
+
+class DataVersionTests(RailroadTestCase):
+    def test_versions_outlive_cached_responses(self):
+        versions = get_versions(("journey", "station"))
+
+        cache.clear()
+
+        self.assertEqual(
+            get_versions(("journey", "station")), versions
+        )
+
+
+class ListProjectionTests(RailroadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.without_route = sample_journey(route=None)
+        self.without_train = sample_journey(train=None)
+        order = Order.objects.create(user=self.staff)
+        for journey in (
+            self.journey,
+            self.without_route,
+            self.without_train,
+        ):
+            Ticket.objects.create(
+                journey=journey,
+                order=order,
+                cargo=1,
+                seat=1,
+            )
+
+    def assert_matches_serializer(
+        self, url, queryset, serializer_class
+    ):
+        response = self.client.get(url)
+        self.assertEqual(
+            response.status_code, status.HTTP_200_OK
+        )
+        projected = response.data["results"]
+
+        rows = queryset.in_bulk(
+            [row["id"] for row in projected]
+        )
+        request = APIRequestFactory().get(url)
+        serialized = serializer_class(
+            [rows[row["id"]] for row in projected],
+            many=True,
+            context={"request": request},
+        ).data
+
+        self.assertEqual(len(projected), 3)
+        self.assertEqual(
+            JSONRenderer().render(projected),
+            JSONRenderer().render(serialized),
+        )
+
+    def test_journey_list_matches_serializer(self):
+        self.assert_matches_serializer(
+            JOURNEYS_URL,
+            Journey.objects.all(),
+            JourneyListSerializer,
+        )
+
+    def test_ticket_list_matches_serializer(self):
+        self.assert_matches_serializer(
+            TICKETS_URL,
+            Ticket.objects.all(),
+            TicketListSerializer,
+        )
+
+
+class TicketPaginationTests(RailroadTestCase):
+    def setUp(self):
+        super().setUp()
+        later = sample_journey(
+            departure_time=timezone.now()
+            + timedelta(days=2),
+            arrival_time=timezone.now() + timedelta(days=3),
+        )
+        order = Order.objects.create(user=self.staff)
+        self.tickets = [
+            Ticket.objects.create(
+                journey=journey,
+                order=order,
+                cargo=1,
+                seat=seat,
+            )
+            for seat, journey in enumerate(
+                (later, self.journey, later), start=1
+            )
+        ]
+
+    def test_pages_follow_ticket_ids(self):
+        url = f"{TICKETS_URL}?page_size=2"
+        ids = []
+        while url:
+            response = self.client.get(url)
+            ids += [
+                row["id"]
+                for row in response.data["results"]
+            ]
+            url = response.data["next"]
+
+        self.assertEqual(
+            ids, [ticket.id for ticket in self.tickets]
+        )
+
+    def test_sparse_page_loads_no_journeys(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f"{TICKETS_URL}?page_size=2&fields=id,seat"
+            )
+
+        self.assertIsNotNone(response.data["next"])
+
+
+class TimetableTests(RailroadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.timetable = Timetable()
+
+    def journeys(self):
+        return [
+            connection.journey
+            for connection in self.timetable.connections(
+                timezone.now() - timedelta(days=1)
+            )
+        ]
+
+    def test_past_journeys_are_left_out(self):
+        sample_journey(
+            departure_time=timezone.now()
+            - timedelta(hours=2),
+            arrival_time=timezone.now()
+            - timedelta(hours=1),
+        )
+
+        self.assertEqual(self.journeys(), [self.journey.id])
+
+    def test_schedule_change_reloads_one_station(self):
+        self.journeys()
+        later = sample_journey(
+            departure_time=timezone.now()
+            + timedelta(days=2),
+            arrival_time=timezone.now() + timedelta(days=3),
+        )
+
+        # Only the connections leaving the source station are read.
+        with self.assertNumQueries(1):
+            journeys = self.journeys()
+
+        self.assertEqual(
+            journeys, [self.journey.id, later.id]
+        )
+
+    def test_route_change_rebuilds(self):
+        self.journeys()
+        self.journey.route.delete()
+
+        self.assertEqual(self.journeys(), [])
+
+
+class SeatCounterTests(RailroadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = sample_journey()
+        self.order = Order.objects.create(user=self.staff)
+        for journey in (self.journey, self.other):
+            for seat in (1, 2):
+                Ticket.objects.create(
+                    journey=journey,
+                    order=self.order,
+                    cargo=1,
+                    seat=seat,
+                )
+
+    def taken_seats(self):
+        return list(
+            Journey.objects.filter(
+                pk__in=(self.journey.pk, self.other.pk)
+            )
+            .order_by("pk")
+            .values_list("taken_seats", flat=True)
+        )
+
+    def test_order_delete_releases_seats_once_per_journey(
+        self,
+    ):
+        with CaptureQueriesContext(connection) as context:
+            self.order.delete()
+
+        updates = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith(
+                'UPDATE "railroad_journey"'
+            )
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.taken_seats(), [0, 0])
+
+    def test_ticket_delete_releases_its_seat(self):
+        self.order.tickets.filter(
+            journey=self.journey
+        ).first().delete()
+
+        self.assertEqual(self.taken_seats(), [1, 2])
+
+    def test_journey_delete_keeps_other_counters(self):
+        self.other.delete()
+
+        self.assertEqual(
+            Journey.objects.get(
+                pk=self.journey.pk
+            ).taken_seats,
+            2,
+        )
+
+
+class OrderSeatTests(RailroadTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_user = (
+            get_user_model().objects.create_user(
+                email="other@railroad.test",
+                password="password",
+            )
+        )
+        self.sell((1, 1), (1, 2))
+
+    def sell(self, *seats):
+        order = Order.objects.create(user=self.other_user)
+        for cargo, seat in seats:
+            Ticket.objects.create(
+                journey=self.journey,
+                order=order,
+                cargo=cargo,
+                seat=seat,
+            )
+
+    def tickets(self, *seats):
+        return [
+            {
+                "journey": self.journey.id,
+                "cargo": cargo,
+                "seat": seat,
+            }
+            for cargo, seat in seats
+        ]
+
+    def test_conflict_lists_exactly_the_sold_seats(self):
+        response = self.client.post(
+            ORDERS_URL,
+            {
+                "tickets": self.tickets(
+                    (1, 2), (1, 3), (1, 1)
+                )
+            },
+            format="json",
+        )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_409_CONFLICT
+        )
+        self.assertEqual(
+            response.data["conflicts"],
+            self.tickets((1, 1), (1, 2)),
+        )
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_sold_seats_are_looked_up_in_batches(self):
+        seats = {
+            (self.journey.id, cargo, seat)
+            for cargo in range(1, 41)
+            for seat in range(1, 41)
+        }
+
+        self.assertEqual(
+            inventory.sold_seats(seats),
+            {
+                (self.journey.id, 1, 1),
+                (self.journey.id, 1, 2),
+            },
+        )
+
+    def test_seats_held_by_another_user_are_rejected(self):
+        SeatHold.objects.create(
+            user=self.other_user,
+            journey=self.journey,
+            cargo=2,
+            seat=1,
+            expires_at=timezone.now()
+            + timedelta(minutes=5),
+        )
+
+        response = self.client.post(
+            ORDERS_URL,
+            {"tickets": self.tickets((2, 1))},
+            format="json",
+        )
+
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertFalse(
+            Ticket.objects.filter(cargo=2, seat=1).exists()
+        )
+
+    def test_bulk_falls_back_to_one_order_at_a_time(self):
+        sold_seats = inventory.sold_seats
+        raced = []
+
+        def sold_before_race(seats):
+            taken = sold_seats(seats)
+            if not raced:
+                # Another order takes the seat after the check.
+                raced.append(True)
+                self.sell((2, 1))
+            return taken
+
+        lines = [
+            {"tickets": self.tickets((2, 1))},
+            {"tickets": self.tickets((2, 2))},
+        ]
+        with mock.patch.object(
+            inventory, "sold_seats", sold_before_race
+        ):
+            response = self.client.post(
+                BULK_ORDERS_URL,
+                "\n".join(
+                    json.dumps(line) for line in lines
+                ),
+                content_type="application/x-ndjson",
+            )
+            results = [
+                json.loads(line)
+                for line in b"".join(
+                    response.streaming_content
+                ).splitlines()
+            ]
+
+        self.assertEqual(
+            results[0],
+            {"line": 1, "conflicts": self.tickets((2, 1))},
+        )
+        self.assertEqual(results[1]["line"], 2)
+        self.assertTrue(
+            Order.objects.filter(
+                pk=results[1]["id"], user=self.staff
+            ).exists()
+        )
@@ -0,0 +1,308 @@
+import heapq
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import timedelta
+from itertools import islice, takewhile
+
+from django.utils import timezone
+
+from railroad.indexes import LazyIndex
+from railroad.models import Journey, Station
+from railroad.response_cache import get_versions
+
+Connection = namedtuple(
+    "Connection",
+    (
+        "departure_time",
+        "arrival_time",
+        "source",
+        "destination",
+        "journey",
+    ),
+)
+
+
+Schedule = namedtuple(
+    "Schedule", ("connections", "since", "departures")
+)
+
+# Past connections are never searched; a full rebuild drops them.
+REBUILD_AFTER = timedelta(hours=1)
+
+
+def all_connections(since, sources=None):
+    """Connections departing at or after ``since``, sorted.
+
+    ``sources`` limits them to the given departure stations.
+    """
+    rows = Journey.objects.filter(
+        route__isnull=False, departure_time__gte=since
+    )
+    if sources is not None:
+        rows = rows.filter(route__source_id__in=sources)
+    rows = rows.values_list(
+        "departure_time",
+        "arrival_time",
+        "route__source_id",
+        "route__destination_id",
+        "id",
+    )
+    return sorted(Connection(*row) for row in rows)
+
+
+BOARD_FIELDS = {
+    "departures": ("departure_time", "route__source_id"),
+    "arrivals": ("arrival_time", "route__destination_id"),
+}
+
+
+def board_version(kind, station):
+    return f"board:{kind}:{station}"
+
+
+def journey_boards(journey_id):
+    """Versions of the boards listing a journey, as stored now."""
+    stations = (
+        Journey.objects.filter(pk=journey_id)
+        .values_list(
+            "route__source_id", "route__destination_id"
+        )
+        .first()
+    )
+    if stations is None or None in stations:
+        return set()
+    source, destination = stations
+    return {
+        board_version("departures", source),
+        board_version("arrivals", destination),
+    }
+
+
+def departure_versions(stations):
+    return dict(
+        zip(
+            stations,
+            get_versions(
+                [
+                    board_version("departures", station)
+                    for station in stations
+                ]
+            ),
+        )
+    )
+
+
+class Timetable(LazyIndex):
+    """Upcoming journeys as connections sorted by departure time.
+
+    A schedule change reloads only the connections of the stations
+    whose departures board version moved. A route change, which can
+    move journeys between stations, rebuilds everything.
+    """
+
+    versions = ("timetable", "route")
+
+    def build(self):
+        since = timezone.now()
+        stations = list(
+            Station.objects.values_list("id", flat=True)
+        )
+        # Board versions are read before the connections, so a write
+        # landing in between is reloaded by the next refresh.
+        departures = departure_versions(stations)
+        return Schedule(
+            all_connections(since), since, departures
+        )
+
+    def refresh(self, schedule, data_versions, versions):
+        _, built_routes = data_versions
+        _, routes = versions
+        if (
+            built_routes != routes
+            or timezone.now() - schedule.since
+            > REBUILD_AFTER
+        ):
+            return None
+
+        departures = departure_versions(schedule.departures)
+        changed = {
+            station
+            for station, version in departures.items()
+            if schedule.departures[station] != version
+        }
+        if not changed:
+            return schedule
+
+        kept = (
+            connection
+            for connection in schedule.connections
+            if connection.source not in changed
+        )
+        fresh = all_connections(schedule.since, changed)
+        return Schedule(
+            list(heapq.merge(kept, fresh)),
+            schedule.since,
+            departures,
+        )
+
+    def connections(self, departure_after):
+        connections = self.get().connections
+        start = bisect_left(connections, (departure_after,))
+        return islice(connections, start, None)
+
+    def earliest_arrival(
+        self,
+        source,
+        destination,
+        departure_after,
+        min_transfer,
+        max_legs,
+    ):
+        """Connection scan keeping one label per station and leg count.
+
+        Returns the legs of the earliest arriving itinerary that needs
+        at most ``max_legs`` journeys, preferring fewer legs on ties,
+        or None when the destination can't be reached.
+        """
+        labels = [{} for _ in range(max_legs + 1)]
+        labels[0][source] = (departure_after, None)
+        best_arrival = None
+
+        for connection in self.connections(departure_after):
+            if (
+                best_arrival is not None
+                and connection.departure_time
+                >= best_arrival
+            ):
+                break
+            if connection.destination == source:
+                continue
+            for legs in range(1, max_legs + 1):
+                previous = labels[legs - 1].get(
+                    connection.source
+                )
+                if previous is None:
+                    continue
+                ready_at = previous[0]
+                if legs > 1:
+                    ready_at += min_transfer
+                if ready_at > connection.departure_time:
+                    continue
+                reached = labels[legs].get(
+                    connection.destination
+                )
+                if (
+                    reached is None
+                    or connection.arrival_time < reached[0]
+                ):
+                    labels[legs][connection.destination] = (
+                        connection.arrival_time,
+                        connection,
+                    )
+                    if (
+                        connection.destination
+                        == destination
+                        and (
+                            best_arrival is None
+                            or connection.arrival_time
+                            < best_arrival
+                        )
+                    ):
+                        best_arrival = (
+                            connection.arrival_time
+                        )
+
+        candidates = [
+            (labels[legs][destination][0], legs)
+            for legs in range(1, max_legs + 1)
+            if destination in labels[legs]
+        ]
+        if not candidates:
+            return None
+
+        _, legs = min(candidates)
+        path = []
+        station = destination
+        for leg in range(legs, 0, -1):
+            connection = labels[leg][station][1]
+            path.append(connection)
+            station = connection.source
+        return path[::-1]
+
+    def search(
+        self,
+        source,
+        destination,
+        departure_after,
+        min_transfer,
+        max_transfers,
+        limit,
+    ):
+        itineraries = []
+        while len(itineraries) < limit:
+            legs = self.earliest_arrival(
+                source,
+                destination,
+                departure_after,
+                min_transfer,
+                max_transfers + 1,
+            )
+            if legs is None:
+                break
+            itineraries.append(legs)
+            departure_after = (
+                legs[0].departure_time
+                + timedelta.resolution
+            )
+        return itineraries
+
+
+class StationBoards:
+    """Departures and arrivals of each station sorted by time.
+
+    Every board is loaded on its first read and kept under its own
+    data version, so saving a journey reloads only the boards of the
+    stations it leaves from and arrives at, in every process.
+    """
+
+    def __init__(self):
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load(kind, station):
+        time_field, station_field = BOARD_FIELDS[kind]
+        return sorted(
+            Journey.objects.filter(
+                **{station_field: station}
+            ).values_list(time_field, "id")
+        )
+
+    def get(self, kind, station):
+        versions = get_versions(
+            ("route", board_version(kind, station))
+        )
+        with self._lock:
+            cached = self._boards.get((kind, station))
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+        board = self.load(kind, station)
+        with self._lock:
+            self._boards[kind, station] = versions, board
+        return board
+
+    def board(self, kind, station, start, end, limit):
+        """Ids of journeys at ``station`` between ``start`` and ``end``."""
+        board = self.get(kind, station)
+        position = bisect_left(board, (start,))
+        entries = takewhile(
+            lambda entry: entry[0] < end,
+            islice(board, position, position + limit),
+        )
+        return [journey for _, journey in entries]
+
+
+timetable = Timetable()
+station_boards = StationBoards()
@@ -6,6 +6,7 @@ from railroad.views import (
     JourneyViewSet,
     OrderViewSet,
     RouteViewSet,
+    SeatHoldViewSet,
     StationViewSet,
     TicketViewSet,
     TrainTypeViewSet,
@@ -19,6 +20,7 @@ router.register("trains/types", TrainTypeViewSet)
 router.register("trains", TrainViewSet)
 router.register("crew", CrewViewSet)
 router.register("orders", OrderViewSet)
+router.register("holds", SeatHoldViewSet)
 router.register("journeys", JourneyViewSet)
 router.register("tickets", TicketViewSet)
 
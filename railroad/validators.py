@@ -1,5 +1,11 @@
+from collections import defaultdict
+
 from rest_framework.serializers import ValidationError
 from django.db.models import Q
+from django.utils import timezone
+
+from railroad import holds
+from railroad.models import Journey, SeatHold
 
 
 # available tickets
@@ -7,18 +13,71 @@ from django.db.models import Q
 # crew is free at the journey dates
 
 
+def resolve_journeys(items, journeys=None):
+    """Replace journey ids of ``items`` with journeys in one query."""
+    journeys = dict(journeys or {})
+    missing = {item["journey"] for item in items} - set(journeys)
+    if missing:
+        journeys.update(
+            Journey.objects.select_related("train").in_bulk(
+                missing
+            )
+        )
+    for item in items:
+        journey = journeys.get(item["journey"])
+        if journey is None:
+            raise ValidationError(
+                f'Invalid journey "{item["journey"]}" - '
+                "object does not exist."
+            )
+        item["journey"] = journey
+
+
 class OrderValidatorMixin:
+    def resolve_references(self, attrs):
+        hold_ids = attrs.get("holds", [])
+        seat_holds = SeatHold.objects.in_bulk(hold_ids)
+        if len(seat_holds) != len(set(hold_ids)):
+            raise ValidationError("Invalid seat hold")
+        attrs["holds"] = list(seat_holds.values())
+
+        hold_items = [
+            {"journey": hold.journey_id}
+            for hold in attrs["holds"]
+        ]
+        resolve_journeys(
+            attrs.get("tickets", [])
+            + attrs.get("seat_requests", [])
+            + hold_items,
+            self.context.get("journeys"),
+        )
+        for hold, item in zip(attrs["holds"], hold_items):
+            hold.journey = item["journey"]
+
     @staticmethod
     def validate_places(attrs):
+        tickets_by_journey = defaultdict(list)
         for ticket in attrs.get("tickets"):
-            journey = ticket.get("journey")
+            tickets_by_journey[ticket["journey"]].append(ticket)
+
+        for journey, tickets in tickets_by_journey.items():
             train = journey.train
-            if ticket.get("seat") > train.places_in_cargo:
+            if train is None:
+                raise ValidationError(
+                    "Journey has no train assigned"
+                )
+            seats = {ticket["seat"] for ticket in tickets}
+            cargos = {ticket["cargo"] for ticket in tickets}
+            if min(seats) < 1 or min(cargos) < 1:
+                raise ValidationError(
+                    "Cargo and seat numbers start from 1"
+                )
+            if max(seats) > train.places_in_cargo:
                 raise ValidationError(
                     "Seat number can't be greater than places_in_cargo; "
                     f"maximum = {train.places_in_cargo}"
                 )
-            if ticket.get("cargo") > train.cargo_num:
+            if max(cargos) > train.cargo_num:
                 raise ValidationError(
                     "Cargo with such number does not exist; "
                     f"maximum = {train.cargo_num}"
@@ -35,9 +94,51 @@ class OrderValidatorMixin:
                 "There are tickets with the same seats"
             )
 
+    @staticmethod
+    def validate_own_holds(attrs, user):
+        now = timezone.now()
+        for hold in attrs.get("holds", []):
+            if hold.user_id != user.id:
+                raise ValidationError(
+                    "Seat hold belongs to another user"
+                )
+            if hold.expires_at <= now:
+                raise ValidationError("Seat hold has expired")
+
+    @staticmethod
+    def validate_not_held(attrs, user):
+        held_by_others = (
+            holds.active_holds()
+            .filter(holds.seats_filter(attrs.get("tickets")))
+            .exclude(user=user)
+        )
+        if held_by_others.exists():
+            raise ValidationError(
+                "Some of these seats are held by another user"
+            )
+
+    def get_buyer(self, attrs):
+        request = self.context.get("request")
+        if request is not None and request.user.is_authenticated:
+            return request.user
+        return attrs.get("user")
+
     def validate(self, attrs):
+        buyer = self.get_buyer(attrs)
         self.validate_places(attrs)
         self.validate_same_places(attrs)
+        self.validate_own_holds(attrs, buyer)
+        self.validate_not_held(attrs, buyer)
+        return attrs
+
+
+class SeatHoldValidatorMixin:
+    def validate(self, attrs):
+        resolve_journeys(attrs)
+        OrderValidatorMixin.validate_places({"tickets": attrs})
+        OrderValidatorMixin.validate_same_places(
+            {"tickets": attrs}
+        )
         return attrs
 
 
@@ -1,32 +1,92 @@
-from rest_framework import status
+import json
+from datetime import timedelta
+
+from django.db.models import Count, Min, Prefetch, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    NotFound,
+    ValidationError,
+)
+from rest_framework.permissions import (
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
 from rest_framework.viewsets import (
+    GenericViewSet,
     ModelViewSet,
     ReadOnlyModelViewSet,
 )
 
-from railroad.filters import JourneyFilter, TrainFilter
+from railroad import bulk, exports, geo, holds, renditions
+from railroad.fieldsets import SparseFieldsetMixin
+from railroad.filters import (
+    JourneyFilter,
+    OrderFilter,
+    TicketFilter,
+    TrainFilter,
+)
+from railroad.geo import station_locator
+from railroad.idempotency import IdempotentCreateMixin
 from railroad.models import (
     Crew,
     Journey,
     Order,
     Route,
+    SeatHold,
     Station,
     Ticket,
     Train,
     TrainType,
 )
+from railroad.network import route_network
+from railroad.pagination import (
+    JourneyPagination,
+    OrderHistoryPagination,
+    OrderPagination,
+    TicketPagination,
+)
+from railroad.projections import (
+    JourneyListProjection,
+    ProjectedListMixin,
+    StationListProjection,
+    TicketListProjection,
+)
+from railroad.response_cache import (
+    CachedResponseMixin,
+    ConditionalGetMixin,
+)
+from railroad.search import station_names
+from railroad.seat_map import seat_maps
 from railroad.serializers import (
+    AutocompleteSearchSerializer,
+    BoardSearchSerializer,
+    ConnectionSearchSerializer,
     CrewDetailSerializer,
     CrewSerializer,
+    ExportSearchSerializer,
+    DistanceMatrixSearchSerializer,
+    DistanceMatrixSerializer,
+    ItinerarySerializer,
     JourneyDetailSerializer,
     JourneyListSerializer,
     JourneySerializer,
+    NearbySearchSerializer,
+    NearbyStationSerializer,
+    OrderHistorySerializer,
+    OrderHistorySummarySerializer,
     OrderSerializer,
     RouteDetailSerializer,
     RouteListSerializer,
     RouteSerializer,
+    SeatHoldSerializer,
+    SeatMapSerializer,
+    ShortestPathSearchSerializer,
+    ShortestPathSerializer,
+    StationNameSerializer,
     StationSerializer,
     TicketDetailSerializer,
     TicketListSerializer,
@@ -36,49 +96,264 @@ from railroad.serializers import (
     TrainTypeSerializer, CrewImageSerializer, CrewListSerializer, TrainImageSerializer, StationImageSerializer,
     StationListDetailSerializer,
 )
+from railroad.timetable import station_boards, timetable
 
 
-class TicketViewSet(ReadOnlyModelViewSet):
+class TicketViewSet(
+    ProjectedListMixin, SparseFieldsetMixin, ReadOnlyModelViewSet
+):
     queryset = Ticket.objects.select_related(
         "journey__route__source",
         "journey__route__destination",
         "journey__train__train_type",
         "order__user",
     )
+    pagination_class = TicketPagination
+    list_projection = TicketListProjection
+    filterset_class = TicketFilter
 
     def get_serializer_class(self):
         if self.action == "list":
             return TicketListSerializer
         return TicketDetailSerializer
 
+    @action(
+        methods=["GET"],
+        url_path="export",
+        detail=False,
+        permission_classes=(IsAdminUser,),
+    )
+    def export(self, request):
+        search = ExportSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        return exports.streaming_export(
+            self.filter_queryset(self.get_queryset()),
+            exports.TICKET_COLUMNS,
+            search.validated_data["export_format"],
+            "tickets",
+        )
 
-class JourneyViewSet(ModelViewSet):
+
+class JourneyViewSet(
+    ConditionalGetMixin,
+    ProjectedListMixin,
+    SparseFieldsetMixin,
+    ModelViewSet,
+):
     filterset_class = JourneyFilter
     queryset = Journey.objects.select_related(
         "route__source",
         "route__destination",
         "train__train_type",
     )
+    pagination_class = JourneyPagination
+    list_projection = JourneyListProjection
+    cache_versions = (
+        "journey",
+        "route",
+        "station",
+        "train",
+        "traintype",
+    )
 
     def get_serializer_class(self):
         if self.action == "list":
             return JourneyListSerializer
         if self.action == "retrieve":
             return JourneyDetailSerializer
+        if self.action == "seat_map":
+            return SeatMapSerializer
+        if self.action == "connections":
+            return ItinerarySerializer
         return JourneySerializer
 
+    @action(
+        methods=["GET"],
+        url_path="connections",
+        detail=False
+    )
+    def connections(self, request):
+        search = ConnectionSearchSerializer(
+            data=request.query_params
+        )
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        itineraries = timetable.search(
+            params["source"],
+            params["destination"],
+            params["departure_after"],
+            timedelta(minutes=params["min_transfer"]),
+            params["max_transfers"],
+            params["limit"],
+        )
+        journeys = self.get_queryset().in_bulk(
+            {leg.journey for legs in itineraries for leg in legs}
+        )
+        serializer = self.get_serializer(
+            [
+                {
+                    "departure_time": legs[0].departure_time,
+                    "arrival_time": legs[-1].arrival_time,
+                    "transfers": len(legs) - 1,
+                    "legs": [journeys[leg.journey] for leg in legs],
+                }
+                for legs in itineraries
+                if all(leg.journey in journeys for leg in legs)
+            ],
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["GET"],
+        url_path="seat-map",
+        detail=True
+    )
+    def seat_map(self, request, pk=None):
+        journey = self.get_object()
+        if journey.train is None:
+            raise ValidationError(
+                "Journey has no train assigned"
+            )
+        seat_map = seat_maps.get(journey)
+        data = {
+            "journey": journey.id,
+            "cargo_num": seat_map.cargo_num,
+            "places_in_cargo": seat_map.places_in_cargo,
+            "bitmap": seat_map.encode(),
+        }
+        expand = request.query_params.get("expand", "")
+        if "seats" in expand.split(","):
+            data["cargos"] = seat_map.taken_by_cargo()
+        serializer = self.get_serializer(data)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-class OrderViewSet(ModelViewSet):
+
+class OrderViewSet(
+    SparseFieldsetMixin, IdempotentCreateMixin, ModelViewSet
+):
     queryset = Order.objects.select_related(
         "user"
     ).prefetch_related("tickets")
-    serializer_class = OrderSerializer
+    pagination_class = OrderPagination
+    filterset_class = OrderFilter
+
+    def get_serializer_class(self):
+        if self.action == "history":
+            return OrderHistorySerializer
+        return OrderSerializer
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @staticmethod
+    def get_history_summary(user):
+        upcoming = Q(journey__departure_time__gt=timezone.now())
+        return Ticket.objects.filter(order__user=user).aggregate(
+            orders=Count("order", distinct=True),
+            tickets=Count("id"),
+            journeys=Count("journey", distinct=True),
+            upcoming_journeys=Count(
+                "journey", distinct=True, filter=upcoming
+            ),
+            next_departure=Min(
+                "journey__departure_time", filter=upcoming
+            ),
+        )
+
+    @action(
+        methods=["GET"],
+        url_path="history",
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+    )
+    def history(self, request):
+        tickets = Ticket.objects.select_related(
+            "journey__route__source",
+            "journey__route__destination",
+            "journey__train__train_type",
+        )
+        orders = self.filter_queryset(
+            Order.objects.filter(user=request.user).prefetch_related(
+                Prefetch("tickets", queryset=tickets)
+            )
+        )
+        paginator = OrderHistoryPagination()
+        page = paginator.paginate_queryset(orders, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        summary = OrderHistorySummarySerializer(
+            self.get_history_summary(request.user)
+        )
+        response.data = {"summary": summary.data, **response.data}
+        return response
+
+    @action(
+        methods=["POST"],
+        url_path="bulk",
+        detail=False
+    )
+    def bulk_create(self, request):
+        results = bulk.ingest_orders(
+            request.stream or [],
+            request.user,
+            self.get_serializer_context(),
+        )
+        return StreamingHttpResponse(
+            (json.dumps(result) + "\n" for result in results),
+            content_type="application/x-ndjson",
+        )
+
+    @action(
+        methods=["GET"],
+        url_path="export",
+        detail=False,
+        permission_classes=(IsAdminUser,),
+    )
+    def export(self, request):
+        search = ExportSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        orders = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .annotate(tickets_count=Count("tickets"))
+        )
+        return exports.streaming_export(
+            orders,
+            exports.ORDER_COLUMNS,
+            search.validated_data["export_format"],
+            "orders",
+        )
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+
+    def get_queryset(self):
+        return holds.active_holds().filter(
+            user=self.request.user
+        )
+
+    def create(self, request, *args, **kwargs):
+        data = request.data
+        if not isinstance(data, list):
+            data = [data]
+        serializer = self.get_serializer(data=data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED
+        )
+
 
-class CrewViewSet(ModelViewSet):
+class CrewViewSet(SparseFieldsetMixin, ModelViewSet):
     queryset = Crew.objects
 
     def get_queryset(self):
@@ -108,18 +383,30 @@ class CrewViewSet(ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        renditions.save_image(serializer)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TrainTypeViewSet(ModelViewSet):
+class TrainTypeViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsetMixin,
+    ModelViewSet,
+):
     serializer_class = TrainTypeSerializer
     queryset = TrainType.objects.all()
+    cache_versions = ("traintype",)
 
 
-class TrainViewSet(ModelViewSet):
+class TrainViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsetMixin,
+    ModelViewSet,
+):
     filterset_class = TrainFilter
     queryset = Train.objects.select_related("train_type")
+    cache_versions = ("train", "traintype")
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -139,20 +426,145 @@ class TrainViewSet(ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        renditions.save_image(serializer)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class StationViewSet(ModelViewSet):
+class StationViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    ProjectedListMixin,
+    SparseFieldsetMixin,
+    ModelViewSet,
+):
     queryset = Station.objects.all()
+    cache_versions = ("station",)
+    list_projection = StationListProjection
 
     def get_serializer_class(self):
         if self.action == "upload_image":
             return StationImageSerializer
         if self.action in ("list", "retrieve"):
             return StationListDetailSerializer
+        if self.action == "nearby":
+            return NearbyStationSerializer
+        if self.action == "autocomplete":
+            return StationNameSerializer
+        if self.action == "distance_matrix":
+            return DistanceMatrixSerializer
+        if self.action in ("departures", "arrivals"):
+            return JourneyListSerializer
         return StationSerializer
 
+    def board(self, request, kind):
+        station = self.get_object()
+        search = BoardSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        journey_ids = station_boards.board(
+            kind,
+            station.id,
+            params["from"],
+            params["from"] + timedelta(hours=params["hours"]),
+            params["limit"],
+        )
+        journeys = Journey.objects.select_related(
+            "route__source",
+            "route__destination",
+            "train__train_type",
+        ).in_bulk(journey_ids)
+        serializer = self.get_serializer(
+            [journeys[pk] for pk in journey_ids if pk in journeys],
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["GET"],
+        url_path="departures",
+        detail=True
+    )
+    def departures(self, request, pk=None):
+        return self.board(request, "departures")
+
+    @action(
+        methods=["GET"],
+        url_path="arrivals",
+        detail=True
+    )
+    def arrivals(self, request, pk=None):
+        return self.board(request, "arrivals")
+
+    @action(
+        methods=["GET"],
+        url_path="distance-matrix",
+        detail=False
+    )
+    def distance_matrix(self, request):
+        search = DistanceMatrixSearchSerializer(
+            data=request.query_params
+        )
+        search.is_valid(raise_exception=True)
+        ids = search.validated_data["ids"]
+
+        coordinates = {
+            pk: (latitude, longitude)
+            for pk, latitude, longitude in Station.objects.filter(
+                pk__in=ids
+            ).values_list("id", "latitude", "longitude")
+        }
+        if missing := [pk for pk in ids if pk not in coordinates]:
+            raise ValidationError(
+                {"ids": f"Stations do not exist: {missing}"}
+            )
+
+        latitudes, longitudes = zip(
+            *(coordinates[pk] for pk in ids)
+        )
+        matrix = geo.distance_matrix(latitudes, longitudes)
+        serializer = self.get_serializer(
+            {"ids": ids, "matrix": matrix.round(3).tolist()}
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["GET"],
+        url_path="autocomplete",
+        detail=False
+    )
+    def autocomplete(self, request):
+        search = AutocompleteSearchSerializer(
+            data=request.query_params
+        )
+        search.is_valid(raise_exception=True)
+
+        stations = station_names.autocomplete(
+            search.validated_data["q"],
+            search.validated_data["limit"],
+        )
+        serializer = self.get_serializer(stations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["GET"],
+        url_path="nearby",
+        detail=False
+    )
+    def nearby(self, request):
+        search = NearbySearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        stations = station_locator.nearby(
+            params["lat"],
+            params["lon"],
+            params["radius"],
+            params["k"],
+        )
+        serializer = self.get_serializer(stations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(
         methods=["POST"],
         url_path="upload-image",
@@ -162,18 +574,58 @@ class StationViewSet(ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        renditions.save_image(serializer)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class RouteViewSet(ModelViewSet):
+class RouteViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    SparseFieldsetMixin,
+    ModelViewSet,
+):
     queryset = Route.objects.select_related(
         "source", "destination"
     )
+    cache_versions = ("route", "station")
 
     def get_serializer_class(self):
         if self.action == "list":
             return RouteListSerializer
         if self.action == "retrieve":
             return RouteDetailSerializer
+        if self.action == "shortest_path":
+            return ShortestPathSerializer
         return RouteSerializer
+
+    @action(
+        methods=["GET"],
+        url_path="shortest-path",
+        detail=False
+    )
+    def shortest_path(self, request):
+        search = ShortestPathSearchSerializer(
+            data=request.query_params
+        )
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        found = route_network.shortest_path(
+            params["from"], params["to"]
+        )
+        if found is None:
+            raise NotFound("No route between these stations")
+
+        distance, station_ids = found
+        names = Station.objects.only("id", "name").in_bulk(
+            station_ids
+        )
+        if len(names) != len(station_ids):
+            raise NotFound("No route between these stations")
+        serializer = self.get_serializer(
+            {
+                "distance": distance,
+                "stations": [names[pk] for pk in station_ids],
+            }
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)